@@ -1,16 +1,56 @@
-from Scripts import dsdt, plist, reveal, run, utils
-import getpass, os, tempfile, shutil, plistlib, sys, binascii, zipfile, re, string, json, textwrap
+from Scripts import dsdt, matcher, plist, reveal, run, session, utils
+import getpass, os, tempfile, shutil, plistlib, sys, binascii, zipfile, re, string, json, textwrap, argparse, multiprocessing
+
+# Generators that can be run without interaction - in the format:
+# (name, method name, args)
+BATCH_GENERATORS = (
+    ("FixHPET",      "fix_hpet",             ()),
+    ("FakeEC",       "fake_ec",              ()),
+    ("FakeECLaptop", "fake_ec",              (True,)),
+    ("USBX",         "ssdt_usbx",            ()),
+    ("PluginType",   "plugin_type",          ()),
+    ("PMC",          "ssdt_pmc",             ()),
+    ("RTCAWAC",      "ssdt_awac",            ()),
+    ("USBReset",     "ssdt_rhub",            ()),
+    ("PCIBridge",    "pci_bridge",           ()),
+    ("PNLF",         "ssdt_pnlf",            ()),
+    ("XOSI",         "ssdt_xosi",            ()),
+    ("FixDMAR",      "fix_dmar",             ()),
+    ("SMBus",        "smbus",                ()),
+    ("ALS0",         "ambient_light_sensor", ()),
+    ("IMEIBridge",   "imei_bridge",          ())
+)
+
+def get_batch_generator(name):
+    # Returns the BATCH_GENERATORS entry for the passed name - ignoring
+    # case, spaces, and punctuation
+    name = "".join(x for x in str(name).lower() if x.isalnum())
+    return next((x for x in BATCH_GENERATORS if x[0].lower() == name),None)
 
 class SSDT:
     def __init__(self, **kwargs):
         self.u  = utils.Utils("SSDT Time")
         self.r  = run.Run()
         self.re = reveal.Reveal()
+        # When not interactive, prompts are answered from self.answers, or
+        # with their defaults - and the screen is never cleared
+        self.interactive = kwargs.get("interactive",True)
+        self.answers = []
+        self.last_prompt = None
+        # When deferring, write_ssdt() queues each .dsl for compile_queued()
+        # instead of running iasl right away - and reveal can be turned off
+        # entirely when nobody's watching
+        self.defer_compile = kwargs.get("defer_compile",False)
+        self.compile_queue = []
+        self.reveal = kwargs.get("reveal",True)
         try:
-            self.d = dsdt.DSDT()
+            self.d = dsdt.DSDT(jobs=kwargs.get("jobs",1),use_aml=kwargs.get("use_aml",False))
         except Exception as e:
             print("Something went wrong :( - Aborting!\n - {}".format(e))
             exit(1)
+        # Facts shared between generators - gathered once per set of loaded
+        # tables, and dropped whenever load_dsdt() replaces them
+        self.s = session.Session(self.d)
         self.w = 80
         self.h = 24
         self.red = "\u001b[41;1m"
@@ -45,7 +85,9 @@ class SSDT:
         self.settings = os.path.join(os.path.dirname(os.path.realpath(__file__)),"Scripts","settings.json")
         if os.path.exists(self.settings):
             self.load_settings()
-        self.output = "Results"
+        self.output = kwargs.get("output") or "Results"
+        if not self.interactive:
+            self.resize_window = False
         self.target_irqs = [0,2,8,11]
         self.illegal_names = ("XHC1","EHC1","EHC2","PXSX")
         # _OSI Strings found here: https://learn.microsoft.com/en-us/windows-hardware/drivers/acpi/winacpi-osi
@@ -73,38 +115,71 @@ class SSDT:
             "Windows 11": "Windows 2021",
             "Windows 11, version 22H2": "Windows 2022"
         }
-        self.pre_patches = (
-            {
-                "PrePatch":"GPP7 duplicate _PRW methods",
-                "Comment" :"GPP7._PRW to XPRW to fix Gigabyte's Mistake",
-                "Find"    :"3708584847500A021406535245470214065350525701085F505257",
-                "Replace" :"3708584847500A0214065352454702140653505257010858505257"
-            },
-            {
-                "PrePatch":"GPP7 duplicate UP00 devices",
-                "Comment" :"GPP7.UP00 to UPXX to fix Gigabyte's Mistake",
-                "Find"    :"1047052F035F53425F50434930475050375B82450455503030",
-                "Replace" :"1047052F035F53425F50434930475050375B82450455505858"
-            },
-            {
-                "PrePatch":"GPP6 duplicate _PRW methods",
-                "Comment" :"GPP6._PRW to XPRW to fix ASRock's Mistake",
-                "Find"    :"47505036085F4144520C04000200140F5F505257",
-                "Replace" :"47505036085F4144520C04000200140F58505257"
-            },
-            {
-                "PrePatch":"GPP1 duplicate PTXH devices",
-                "Comment" :"GPP1.PTXH to XTXH to fix MSI's Mistake",
-                "Find"    :"50545848085F41445200140F",
-                "Replace" :"58545848085F41445200140F"
-            }
-        )
+        # OEM pre-patches applied to a DSDT that won't disassemble as-is -
+        # kept in Scripts/pre_patches.json, and only matched against once
+        self.pre_patches_path = os.path.join(os.path.dirname(os.path.realpath(__file__)),"Scripts","pre_patches.json")
+        self.pre_patches = self.load_pre_patches()
+        self.pre_patch_matcher = None
+
+    def grab(self, prompt, **kwargs):
+        # Wrapper around utils.grab() - when running without interaction, we
+        # use any queued answers, then fall back on the default.  If the same
+        # prompt comes back without a queued answer, the default didn't satisfy
+        # it - so we answer "M" to back out of that menu instead of looping.
+        if self.interactive:
+            return self.u.grab(prompt, **kwargs)
+        if self.answers:
+            answer = self.answers.pop(0)
+        elif prompt == self.last_prompt:
+            answer = "m"
+        else:
+            answer = kwargs.get("default","")
+        self.last_prompt = prompt
+        print("{}{}".format(prompt,answer))
+        return answer
+
+    def head(self, text = None):
+        if self.interactive:
+            return self.u.head(text)
+        # Don't clear the screen when running without interaction, just
+        # print the header so it shows up in any logs
+        print("")
+        print("### {} ###".format(text or self.u.name))
+
+    def run_batch(self, path, generators, answers=None):
+        # Loads the tables at the passed path, then runs each generator in order
+        # without interaction.  answers is a dict of generator name -> list of
+        # answers for its prompts.  Returns a list of (name, error) tuples for
+        # anything that failed.
+        self.interactive = False
+        self.resize_window = False
+        answers = answers or {}
+        self.dsdt = self.load_dsdt(path)
+        if not self.dsdt or not self.d.acpi_tables:
+            return [("Load","Could not load tables from {}".format(path))]
+        errors = []
+        for name in generators:
+            generator = get_batch_generator(name)
+            if not generator:
+                errors.append((name,"Unknown generator"))
+                continue
+            self.answers = list(answers.get(generator[0],[]))
+            self.last_prompt = None
+            try:
+                getattr(self,generator[1])(*generator[2])
+            except Exception as e:
+                print("An error occurred: {}".format(e))
+                errors.append((generator[0],str(e)))
+        self.answers = []
+        errors.extend(self.compile_queued())
+        return errors
 
     def save_settings(self):
         settings = {
             "legacy_compiler": self.iasl_legacy,
             "resize_window": self.resize_window,
-            "match_mode": self.match_mode
+            "match_mode": self.match_mode,
+            "native_aml": self.d.use_aml
         }
         try: json.dump(settings,open(self.settings,"w"),indent=2)
         except: return
@@ -116,8 +191,30 @@ class SSDT:
                 self.iasl_legacy = settings.get("legacy_compiler",False)
             self.resize_window = settings.get("resize_window",True)
             self.match_mode = settings.get("match_mode",0)
+            # Passing use_aml turns it on regardless
+            self.d.use_aml = self.d.use_aml or settings.get("native_aml",False)
         except: return
 
+    def load_pre_patches(self):
+        # Returns the list of valid pre-patches in our data file
+        try:
+            with open(self.pre_patches_path) as f:
+                pre_patches = json.load(f)
+        except Exception as e:
+            print("Could not load pre-patches from {}: {}".format(os.path.basename(self.pre_patches_path),e))
+            return []
+        patches = []
+        for p in pre_patches:
+            if not isinstance(p,dict) or not all(x in p for x in ("PrePatch","Comment","Find","Replace")):
+                continue
+            try:
+                binascii.unhexlify(p["Find"])
+                binascii.unhexlify(p["Replace"])
+            except Exception:
+                continue # Not valid hex
+            patches.append(p)
+        return patches
+
     def get_unique_name(self,name,target_folder,name_append="-Patched"):
         # Get a new file name in the Results folder so we don't override the original
         name = os.path.basename(name)
@@ -136,27 +233,27 @@ class SSDT:
                 return check_name
             num += 1 # Increment our counter
 
-    def sorted_nicely(self, l): 
-        convert = lambda text: int(text) if text.isdigit() else text 
-        alphanum_key = lambda key: [ convert(c) for c in re.split('([0-9]+)', key.lower()) ] 
-        return sorted(l, key = alphanum_key)
+    def sorted_nicely(self, l):
+        return self.d.sorted_nicely(l)
 
     def load_dsdt(self, path):
         if not path:
             return
-        self.u.head("Loading ACPI Table(s)")
+        self.head("Loading ACPI Table(s)")
         print("")
         tables = []
         trouble_dsdt = None
         fixed = False
         temp = None
         prior_tables = self.d.acpi_tables # Retain in case of failure
-        # Clear any existing tables so we load anew
+        # Clear any existing tables so we load anew - along with anything
+        # our generators gathered from them
         self.d.acpi_tables = {}
+        self.s.reset()
         if os.path.isdir(path):
             print("Gathering valid tables from {}...\n".format(os.path.basename(path)))
             for t in self.sorted_nicely(os.listdir(path)):
-                if self.d.table_is_valid(path,t):
+                if self.d.table_is_valid(path,t,header_only=True):
                     print(" - {}".format(t))
                     tables.append(t)
             if not tables:
@@ -167,7 +264,7 @@ class SSDT:
                     return self.load_dsdt(os.path.join(path,"ACPI"))
                 print(" - No valid .aml files were found!")
                 print("")
-                self.u.grab("Press [enter] to return...")
+                self.grab("Press [enter] to return...")
                 # Restore any prior tables
                 self.d.acpi_tables = prior_tables
                 return
@@ -183,7 +280,7 @@ class SSDT:
                 print("\nOnly one is allowed at a time.  Please remove all but one of the above and try")
                 print("again.")
                 print("")
-                self.u.grab("Press [enter] to return...")
+                self.grab("Press [enter] to return...")
                 # Restore any prior tables
                 self.d.acpi_tables = prior_tables
                 return
@@ -206,7 +303,7 @@ class SSDT:
                 # Not a DSDT, we aren't applying pre-patches
                 print("\n{} could not be disassembled!".format(os.path.basename(path)))
                 print("")
-                self.u.grab("Press [enter] to return...")
+                self.grab("Press [enter] to return...")
                 # Restore any prior tables
                 self.d.acpi_tables = prior_tables
                 return
@@ -219,63 +316,97 @@ class SSDT:
         else:
             print("Passed file/folder does not exist!")
             print("")
-            self.u.grab("Press [enter] to return...")
+            self.grab("Press [enter] to return...")
             # Restore any prior tables
             self.d.acpi_tables = prior_tables
             return
         # If we got here - check if we have a trouble_dsdt.
         if trouble_dsdt:
-            # We need to move our ACPI files to a temp folder
-            # then try patching the DSDT there
+            # We need to stage our ACPI files in a temp folder
+            # then try patching the DSDT there - it's the only
+            # one we write out, so the rest can just be linked
             temp = tempfile.mkdtemp()
-            for table in tables:
-                shutil.copy(
-                    os.path.join(path,table),
-                    temp
-                )
+            self.d.stage_files([os.path.join(path,t) for t in tables if t != trouble_dsdt],temp)
             # Get a reference to the new trouble file
             trouble_path = os.path.join(temp,trouble_dsdt)
             # Now we try patching it
             print("Checking available pre-patches...")
             print("Loading {} into memory...".format(trouble_dsdt))
-            with open(trouble_path,"rb") as f:
+            with open(os.path.join(path,trouble_dsdt),"rb") as f:
                 d = f.read()
             res = self.d.check_output(self.output)
             target_name = self.get_unique_name(trouble_dsdt,res,name_append="-Patched")
-            patches = []
-            print("Iterating patches...\n")
-            for p in self.pre_patches:
-                if not all(x in p for x in ("PrePatch","Comment","Find","Replace")): continue
-                print(" - {}".format(p["PrePatch"]))
+            # Find every pre-patch in the table up front, then apply
+            # them in order to a buffer - keeping those that only match once
+            # in the table as patched so far.  Patches that keep the length
+            # only need us to look again around the ones before them, and are
+            # checked in memory first.  Once one changes the length, the
+            # offsets we scanned no longer line up - so we count each find in
+            # the buffer as it stands instead.
+            if self.pre_patch_matcher is None:
+                self.pre_patch_matcher = matcher.Matcher([binascii.unhexlify(p["Find"]) for p in self.pre_patches])
+            found = self.pre_patch_matcher.find_all(d)
+            buf = bytearray(d)
+            changed = []
+            shifted = False
+            candidates = []
+            print("Scanning for {:,} patch{}...\n".format(len(self.pre_patches),"" if len(self.pre_patches)==1 else "es"))
+            for i,p in enumerate(self.pre_patches):
                 find = binascii.unhexlify(p["Find"])
-                if d.count(find) == 1:
-                    patches.append(p) # Retain the patch
-                    repl = binascii.unhexlify(p["Replace"])
-                    print(" --> Located - applying...")
-                    d = d.replace(find,repl) # Replace it in memory
+                repl = binascii.unhexlify(p["Replace"])
+                if shifted:
+                    offsets = [buf.find(find)] if find and buf.count(find) == 1 else []
+                else:
+                    offsets = self.d.find_in_patched(buf,find,found.get(i,[]),changed)
+                if len(offsets) != 1: continue
+                print(" - {}".format(p["PrePatch"]))
+                index = offsets[0]
+                if len(find) == len(repl):
+                    error = self.d.check_aml_patch(buf,find,repl,index=index)
+                    if error:
+                        print(" --> Located - but {} - skipping...".format(error))
+                        continue
+                else:
+                    shifted = True
+                print(" --> Located - applying...")
+                buf[index:index+len(find)] = repl
+                changed.append((index,len(find)))
+                candidates.append((p,index,find,repl))
+            def patched(count):
+                # Returns the table with the first count candidates applied
+                return self.d.apply_aml_patches(d,[x[1:] for x in candidates[:count]])
+            def try_candidate(index):
+                # Writes the table with the first index+1 patches applied,
+                # and checks if it disassembles
+                with open(trouble_path,"wb") as f:
+                    f.write(patched(index+1))
+                return bool(self.d.load(trouble_path)[0])
+            if candidates:
+                # Adding a patch can break a table the ones before it fixed -
+                # so walk the prefixes in order, as if applying one patch at a
+                # time, and take the first that disassembles
+                print("\nVerifying {:,} patch{}...".format(len(candidates),"" if len(candidates)==1 else "es"))
+                count = next((i+1 for i in range(len(candidates)) if try_candidate(i)),None)
+                if count:
+                    fixed = True
+                    patches = [x[0] for x in candidates[:count]]
+                    d = patched(count)
+                    # Make sure the table we load later has only those
+                    # patches applied
                     with open(trouble_path,"wb") as f:
-                        f.write(d) # Write the updated file
-                    # Attempt to load again
-                    loaded_table = self.d.load(trouble_path)[0]
-                    if loaded_table:
-                        try:
-                            table = loaded_table[list(loaded_table)[0]]
-                        except:
-                            pass
-                        fixed = True
-                        # We got it to load - let's write the patches
-                        print("\nDisassembled successfully!\n")
-                        self.make_plist(None, None, patches)
-                        # Save to the local file
-                        with open(os.path.join(res,target_name),"wb") as f:
-                            f.write(d)
-                        print("\n!! Patches applied to modified file in Results folder:\n   {}".format(target_name))
-                        self.patch_warn()
-                        break
+                        f.write(d)
+                    # We got it to load - let's write the patches
+                    print("\nDisassembled successfully!\n")
+                    self.make_plist(None, None, patches)
+                    # Save to the local file
+                    with open(os.path.join(res,target_name),"wb") as f:
+                        f.write(d)
+                    print("\n!! Patches applied to modified file in Results folder:\n   {}".format(target_name))
+                    self.patch_warn()
             if not fixed:
                 print("\n{} could not be disassembled!".format(trouble_dsdt))
                 print("")
-                self.u.grab("Press [enter] to return...")
+                self.grab("Press [enter] to return...")
                 if temp:
                     shutil.rmtree(temp,ignore_errors=True)
                 # Restore any prior tables
@@ -303,14 +434,34 @@ class SSDT:
         # make sure we get interaction from the user to continue
         if trouble_dsdt or not loaded_tables or failed:
             print("")
-            self.u.grab("Press [enter] to continue...")
+            self.grab("Press [enter] to continue...")
         if temp:
             shutil.rmtree(temp,ignore_errors=True)
         return path
 
+    def dump_dsdt(self):
+        # Dumps the current system's ACPI tables and loads them - on Linux
+        # each table is disassembled as soon as it's dumped.  If any of them
+        # didn't load, we hand the dump to load_dsdt() to take another look,
+        # as it can pre-patch a DSDT that won't disassemble.
+        output_folder = os.path.join(os.path.dirname(os.path.realpath(__file__)),self.output)
+        acpi_name = self.get_unique_name("OEM",output_folder,name_append="")
+        path = os.path.join(output_folder,acpi_name)
+        prior_tables = self.d.acpi_tables # Retain in case of failure
+        self.d.acpi_tables = {}
+        self.s.reset()
+        loaded = self.d.dump_tables(path,disassemble=True)
+        if not loaded or not loaded[0] or loaded[1]:
+            self.d.acpi_tables = prior_tables
+            if not loaded:
+                return # Nothing was dumped
+            return self.load_dsdt(path)
+        print("\nDone.")
+        return path
+
     def select_dsdt(self, single_table=False):
         while True:
-            self.u.head("Select ACPI Table{}".format("" if single_table else "s"))
+            self.head("Select ACPI Table{}".format("" if single_table else "s"))
             print(" ")
             if self.copy_as_path:
                 print("NOTE:  Currently running as admin on Windows - drag and drop may not work.")
@@ -326,13 +477,9 @@ class SSDT:
                 print("       with the DSDT signature.  If neither condition is met, you will be")
                 print("       returned to the main menu.")
                 print("")
-            dsdt = self.u.grab("Please drag and drop an ACPI table or folder of tables here:  ")
+            dsdt = self.grab("Please drag and drop an ACPI table or folder of tables here:  ")
             if dsdt.lower() == "p" and (sys.platform.startswith("linux") or sys.platform == "win32"):
-                output_folder = os.path.join(os.path.dirname(os.path.realpath(__file__)),self.output)
-                acpi_name = self.get_unique_name("OEM",output_folder,name_append="")
-                return self.load_dsdt(
-                    self.d.dump_tables(os.path.join(output_folder,acpi_name))
-                )
+                return self.dump_dsdt()
             elif dsdt.lower() == "m":
                 return self.dsdt
             elif dsdt.lower() == "q":
@@ -363,16 +510,46 @@ class SSDT:
         iasl_path = self.d.iasl_legacy if self.iasl_legacy else self.d.iasl
         with open(dsl_path,"w") as f:
             f.write(ssdt)
+        if self.defer_compile:
+            # Queue it up - compile_queued() will compile everything at once
+            print("Queued for compiling...")
+            self.compile_queue = [x for x in self.compile_queue if x[1] != dsl_path]
+            self.compile_queue.append((ssdt_name,dsl_path,iasl_path))
+            return True
         print("Compiling...{}".format(" {}!! Using Legacy Compiler !!{}".format(self.yel,self.rst) if self.iasl_legacy else ""))
-        out = self.r.run({"args":[iasl_path, dsl_path]})
-        if out[2] != 0:
-            print(" - {}".format(out[1]))
-            self.re.reveal(dsl_path,True)
+        success,output = self.d.compile_dsl([dsl_path],iasl=iasl_path)[dsl_path]
+        if not success:
+            print(" - {}".format(output))
+            if self.reveal: self.re.reveal(dsl_path,True)
             return False
         else:
-            self.re.reveal(aml_path,True)
+            if self.reveal: self.re.reveal(aml_path,True)
         return True
 
+    def compile_queued(self):
+        # Compiles everything write_ssdt() queued up, batching the iasl calls
+        # and spreading them across our jobs.  Returns a list of (name, error)
+        # tuples for anything that failed to compile.
+        queue,self.compile_queue = self.compile_queue,[]
+        if not queue:
+            return []
+        print("Compiling {:,} queued file{}...".format(len(queue),"" if len(queue)==1 else "s"))
+        errors = []
+        results = {}
+        for iasl_path in set(x[2] for x in queue):
+            results.update(self.d.compile_dsl([x[1] for x in queue if x[2] == iasl_path],iasl=iasl_path))
+        for ssdt_name,dsl_path,iasl_path in queue:
+            success,output = results.get(dsl_path,(False,"Not compiled"))
+            print(" - {}: {}".format(ssdt_name,"Compiled" if success else "Failed"))
+            if not success:
+                for line in output.strip().split("\n"):
+                    print(" --> {}".format(line))
+                errors.append((ssdt_name,"Failed to compile: {}".format(output.strip())))
+        if self.reveal:
+            # Show the results folder once, instead of once per file
+            self.re.reveal(self.d.check_output(self.output),True)
+        return errors
+
     def ensure_path(self, plist_data, path_list, final_type = list):
         if not path_list: return plist_data
         last = plist_data
@@ -492,38 +669,10 @@ class SSDT:
         # Intel devices appear to use _ADR, 0x001F0000
         # AMD devices appear to use _ADR, 0x00140003
         if log: print("Locating LPC(B)/SBRG...")
-        for table_name in self.sorted_nicely(list(self.d.acpi_tables)):
-            table = self.d.acpi_tables[table_name]
-            # The LPCB device will always be the parent of the PNP0C09 device
-            # if found
-            if not skip_ec:
-                ec_list = self.d.get_device_paths_with_hid("PNP0C09",table=table)
-                if len(ec_list):
-                    lpc_name = ".".join(ec_list[0][0].split(".")[:-1])
-                    if log: print(" - Found {} in {}".format(lpc_name,table_name))
-                    return lpc_name
-            # Maybe try common names if we haven't found it yet
-            if not skip_common_names:
-                for x in ("LPCB", "LPC0", "LPC", "SBRG", "PX40"):
-                    try:
-                        lpc_name = self.d.get_device_paths(x,table=table)[0][0]
-                        if log: print(" - Found {} in {}".format(lpc_name,table_name))
-                        return lpc_name
-                    except: pass
-            # Finally check by address - some Intel tables have devices at
-            # 0x00140003
-            paths = self.d.get_path_of_type(obj_type="Name",obj="_ADR",table=table)
-            for path in paths:
-                adr = self.get_address_from_line(path[1],table=table)
-                if adr in (0x001F0000, 0x00140003):
-                    # Get the path minus ._ADR
-                    lpc_name = path[0][:-5]
-                    # Make sure the LPCB device does not have an _HID
-                    lpc_hid = lpc_name+"._HID"
-                    if any(x[0]==lpc_hid for x in table.get("paths",[])):
-                        continue
-                    if log: print(" - Found {} in {}".format(lpc_name,table_name))
-                    return lpc_name
+        lpc_name,table_name = self.s.get_lpc_name(skip_ec=skip_ec,skip_common_names=skip_common_names)
+        if lpc_name:
+            if log: print(" - Found {} in {}".format(lpc_name,table_name))
+            return lpc_name
         if log:
             print(" - Could not locate LPC(B)! Aborting!")
             print("")
@@ -550,7 +699,7 @@ class SSDT:
             # "Return (", or not a single "Return (0x0F)",
             # then we need to patch this out and replace
             try:
-                sta_scope = "\n".join(self.d.get_scope(sta["sta"][0][1],strip_comments=True,table=table))
+                sta_scope = self.d.scope_text(sta["sta"][0][1],strip_comments=True,table=table)
                 if sta_scope.count("Return (") > 1 or not "Return (0x0F)" in sta_scope:
                     print("Multiple returns or not Return (0x0F)")
                     # More than one return, or our return isn't force-enabled
@@ -564,7 +713,7 @@ class SSDT:
     def fake_ec(self, laptop = False):
         if not self.ensure_dsdt():
             return
-        self.u.head("Fake EC")
+        self.head("Fake EC")
         print("")
         print("Locating PNP0C09 (EC) devices...")
         rename = False
@@ -576,9 +725,8 @@ class SSDT:
         patches = []
         lpc_name = None
         ec_located = False
-        for table_name in self.sorted_nicely(list(self.d.acpi_tables)):
+        for table_name,ec_list in self.d.get_namespace_paths_with_id("PNP0C09",("_HID",),by_table=True):
             table = self.d.acpi_tables[table_name]
-            ec_list = self.d.get_device_paths_with_hid("PNP0C09",table=table)
             if len(ec_list):
                 lpc_name = ".".join(ec_list[0][0].split(".")[:-1])
                 print(" - Got {:,} in {}".format(len(ec_list),table_name))
@@ -593,7 +741,7 @@ class SSDT:
                             print(" ----> PNP0C09 (EC) called EC. Renaming")
                             device = ".".join(device.split(".")[:-1]+["EC0"])
                             rename = True
-                    scope = "\n".join(self.d.get_scope(x[1],strip_comments=True,table=table))
+                    scope = self.d.scope_text(x[1],strip_comments=True,table=table)
                     # We need to check for _HID, _CRS, and _GPE
                     if all(y in scope for y in ["_HID","_CRS","_GPE"]):
                         print(" ----> Valid PNP0C09 (EC) Device")
@@ -632,12 +780,12 @@ class SSDT:
         if laptop and named_ec and not patches:
             print(" ----> Named EC device located - no fake needed.")
             print("")
-            self.u.grab("Press [enter] to return to main menu...")
+            self.grab("Press [enter] to return to main menu...")
             return
         if lpc_name is None:
             lpc_name = self.get_lpc_name(skip_ec=True,skip_common_names=True)
         if lpc_name is None:
-            self.u.grab("Press [enter] to return to main menu...")
+            self.grab("Press [enter] to return to main menu...")
             return
         comment = "Faked Embedded Controller"
         if laptop:
@@ -740,21 +888,25 @@ DefinitionBlock ("", "SSDT", 2, "CORP ", "SsdtEC", 0x00001000)
         print("")
         print("Done.")
         self.patch_warn()
-        self.u.grab("Press [enter] to return...")
+        self.grab("Press [enter] to return...")
 
     def plugin_type(self):
         if not self.ensure_dsdt(allow_any=True):
             return
-        self.u.head("Plugin Type")
+        self.head("Plugin Type")
         print("")
         print("Determining CPU name scheme...")
-        for table_name in self.sorted_nicely(list(self.d.acpi_tables)):
+        # Only tables with Processor objects or ACPI0007 devices are worth
+        # checking - the namespace tells us which those are
+        cpu_names = dict(self.d.get_namespace_paths(obj_type="Processor",obj="",by_table=True))
+        cpu_devs  = dict(self.d.get_namespace_paths_with_id("ACPI0007",("_HID",),by_table=True))
+        for table_name in self.s.get_table_names():
+            if not table_name in cpu_names and not table_name in cpu_devs:
+                continue
             ssdt_name = "SSDT-PLUG"
             table = self.d.acpi_tables[table_name]
-            if not table.get("signature") in (b"DSDT",b"SSDT"):
-                continue # We're not checking data tables
             print(" Checking {}...".format(table_name))
-            try: cpu_name = self.d.get_processor_paths(table=table)[0][0]
+            try: cpu_name = cpu_names[table_name][0][0]
             except: cpu_name = None
             if cpu_name:
                 print(" - Found Processor: {}".format(cpu_name))
@@ -798,7 +950,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "CpuPlug", 0x00003000)
             else:
                 ssdt_name += "-ALT"
                 print(" - No Processor objects found...")
-                procs = self.d.get_device_paths_with_hid(hid="ACPI0007",table=table)
+                procs = cpu_devs.get(table_name)
                 if not procs:
                     print(" - No ACPI0007 devices found...")
                     continue
@@ -851,7 +1003,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "CpuPlugA", 0x00003000)
                     if not name:
                         print(" - Could not find an available name scheme! Aborting.")
                         print("")
-                        self.u.grab("Press [enter] to return to main menu...")
+                        self.grab("Press [enter] to return to main menu...")
                         return
                     ssdt+="""
         Processor ([[name]], [[uid]], 0x00000510, 0x06)
@@ -896,12 +1048,12 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "CpuPlugA", 0x00003000)
             print("")
             print("Done.")
             self.patch_warn()
-            self.u.grab("Press [enter] to return...")
+            self.grab("Press [enter] to return...")
             return
         # If we got here - we reached the end
         print("No valid processor devices found!")
         print("")
-        self.u.grab("Press [enter] to return...")
+        self.grab("Press [enter] to return...")
         return
 
     def list_irqs(self):
@@ -1177,9 +1329,9 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "CpuPlugA", 0x00003000)
             max_line = max(lines,key=len)
             if self.resize_window:
                 self.u.resize(max(len(max_line),self.w), max(len(lines)+5,self.h))
-            self.u.head("Select IRQs To Nullify")
+            self.head("Select IRQs To Nullify")
             print("\n".join(lines))
-            menu = self.u.grab("Please select an option (default is C):  ")
+            menu = self.grab("Please select an option (default is C):  ")
             if not len(menu):
                 menu = "c"
             if menu.lower() == "m": return None
@@ -1222,10 +1374,10 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "CpuPlugA", 0x00003000)
     def fix_hpet(self):
         if not self.ensure_dsdt():
             return
-        self.u.head("Fix HPET")
+        self.head("Fix HPET")
         print("")
         print("Locating PNP0103 (HPET) devices...")
-        hpets = self.d.get_device_paths_with_hid("PNP0103")
+        hpets = self.s.get_device_paths_with_hid("PNP0103")
         hpet_fake = not hpets
         patches = []
         hpet_sta = False
@@ -1246,7 +1398,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "CpuPlugA", 0x00003000)
                 if self.d.get_method_paths(name+".XCRS") or self.d.get_name_paths(name+".XCRS"):
                     print(" --> Appears to already be named XCRS!")
                 print("")
-                self.u.grab("Press [enter] to return to main menu...")
+                self.grab("Press [enter] to return to main menu...")
                 return
             print(" - Located at {}._CRS".format(name))
             crs_index = self.d.find_next_hex(hpet[0][1])[1]
@@ -1304,12 +1456,12 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "CpuPlugA", 0x00003000)
             print(" - None located!")
             name = self.get_lpc_name(skip_ec=True,skip_common_names=True)
             if name is None:
-                self.u.grab("Press [enter] to return to main menu...")
+                self.grab("Press [enter] to return to main menu...")
                 return
         devs = self.list_irqs()
         target_irqs = self.get_irq_choice(devs)
         if target_irqs is None: return # Bailed, going to the main menu
-        self.u.head("Creating IRQ Patches")
+        self.head("Creating IRQ Patches")
         print("")
         if sta and sta.get("patches"):
             print(" - {} _STA to XSTA Rename:".format(sta["dev_name"]))
@@ -1529,16 +1681,16 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "HPET", 0x00000000)
         print("")
         print("Done.")
         self.patch_warn()
-        self.u.grab("Press [enter] to return...")
+        self.grab("Press [enter] to return...")
 
     def ssdt_pmc(self):
         if not self.ensure_dsdt():
             return
-        self.u.head("SSDT PMC")
+        self.head("SSDT PMC")
         print("")
         lpc_name = self.get_lpc_name()
         if lpc_name is None:
-            self.u.grab("Press [enter] to return to main menu...")
+            self.grab("Press [enter] to return to main menu...")
             return
         oc = {"Comment":"PMCR for native 300-series NVRAM","Enabled":True,"Path":"SSDT-PMC.aml"}
         self.make_plist(oc, "SSDT-PMC.aml", ())
@@ -1582,7 +1734,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "PMCR", 0x00001000)
         print("")
         print("Done.")
         self.patch_warn()
-        self.u.grab("Press [enter] to return...")
+        self.grab("Press [enter] to return...")
 
     def get_sta_var(self,var="STAS",device=None,dev_hid="ACPI000E",dev_name="AWAC",log_locate=True,table=None):
         # Helper to check for a device, check for (and qualify) an _STA method,
@@ -1601,7 +1753,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "PMCR", 0x00001000)
                 return {"value":False}
         else:
             if log_locate: print("Locating {} ({}) devices...".format(dev_hid,dev_name))
-            dev_list = self.d.get_device_paths_with_hid(dev_hid,table=table)
+            dev_list = self.s.get_device_paths_with_hid(dev_hid,table=table)
             if not len(dev_list):
                 if log_locate: print(" - Could not locate any {} devices".format(dev_hid))
                 return {"valid":False}
@@ -1627,7 +1779,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "PMCR", 0x00001000)
             return {"valid":False,"break":True,"device":dev,"dev_name":name,"dev_hid":dev_hid,"sta_type":sta_type}
         if sta:
             if var:
-                scope = "\n".join(self.d.get_scope(sta[0][1],strip_comments=True,table=table))
+                scope = self.d.scope_text(sta[0][1],strip_comments=True,table=table)
                 has_var = var in scope
                 print(" --> {} {} variable".format("Has" if has_var else "Does NOT have",var))
         else:
@@ -1651,7 +1803,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "PMCR", 0x00001000)
     def ssdt_awac(self):
         if not self.ensure_dsdt():
             return
-        self.u.head("SSDT RTCAWAC")
+        self.head("SSDT RTCAWAC")
         print("")
         rtc_range_needed = False
         rtc_crs_type = None
@@ -1665,7 +1817,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "PMCR", 0x00001000)
             print(" - Fake needed!")
             lpc_name = self.get_lpc_name()
             if lpc_name is None:
-                self.u.grab("Press [enter] to return to main menu...")
+                self.grab("Press [enter] to return to main menu...")
                 return
         else:
             # Let's check if our RTC device has a _CRS variable - and if so, let's look for any skipped ranges
@@ -1743,7 +1895,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "PMCR", 0x00001000)
             print("Valid PNP0B00 (RTC) device located and qualified, and no ACPI000E (AWAC) devices found.")
             print("No patching or SSDT needed.")
             print("")
-            self.u.grab("Press [enter] to return to main menu...")
+            self.grab("Press [enter] to return to main menu...")
             return
         comment = "Incompatible AWAC Fix" if awac_dict.get("valid") else "RTC Fake" if not rtc_dict.get("valid") else "RTC Range Fix" if rtc_range_needed else "RTC Enable Fix"
         suffix  = []
@@ -1902,7 +2054,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "RTCAWAC", 0x00000000)
             print("               variable! Patch(es) and SSDT-RTCAWAC created as a failsafe,")
             print("               but verify you need them by checking the RTC._STA conditions!")
         self.patch_warn()
-        self.u.grab("Press [enter] to return...")
+        self.grab("Press [enter] to return...")
 
     def get_unique_device(self, parent_path, base_name, starting_number=0, used_names=[]):
         # Appends a hex number until a unique device is found
@@ -1925,7 +2077,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "RTCAWAC", 0x00000000)
     def ssdt_rhub(self):
         if not self.ensure_dsdt():
             return
-        self.u.head("USB Reset")
+        self.head("USB Reset")
         print("")
         print("Gathering RHUB/HUBN/URTH devices...")
         rhubs = self.d.get_device_paths("RHUB")
@@ -1934,7 +2086,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "RTCAWAC", 0x00000000)
         if not len(rhubs):
             print(" - None found!  Aborting...")
             print("")
-            self.u.grab("Press [enter] to return to main menu...")
+            self.grab("Press [enter] to return to main menu...")
             return
         print(" - Found {:,}".format(len(rhubs)))
         # Gather some info
@@ -2066,7 +2218,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "UsbReset", 0x00001000)
         print("")
         print("Done.")
         self.patch_warn()
-        self.u.grab("Press [enter] to return...")
+        self.grab("Press [enter] to return...")
         return
 
     def ssdt_usbx(self):
@@ -2077,7 +2229,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "UsbReset", 0x00001000)
             "kUSBWakePortCurrentLimit":"0x0834"
         }
         while True:
-            self.u.head("USBX Device")
+            self.head("USBX Device")
             print("")
             print("Current USBX Device Properties To Use:")
             print("")
@@ -2096,7 +2248,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "UsbReset", 0x00001000)
             print("Add/Edit a property using this format key:value (ie kUSBWakePowerSupply:0x13EC)")
             print("Values must be a 16-bit hexadecimal integer")
             print("")
-            menu = self.u.grab("Please enter your selection (default is B):  ")
+            menu = self.grab("Please enter your selection (default is B):  ")
             if not menu: menu = "b"
             if menu.lower() == "m": return
             elif menu.lower() == "q": self.u.custom_quit()
@@ -2120,7 +2272,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "UsbReset", 0x00001000)
             else: # Assume it's a value we're trying to remove
                 usbx_props.pop(menu,None)
         # Now build!
-        self.u.head("USBX Device")
+        self.head("USBX Device")
         print("")
         print("Creating generic SSDT-USBX...")
         oc = {"Comment":"Generic USBX device for USB power properties","Enabled":True,"Path":"SSDT-USBX.aml"}
@@ -2171,7 +2323,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "SsdtUsbx", 0x00001000)
         print("")
         print("Done.")
         self.patch_warn()
-        self.u.grab("Press [enter] to return...")
+        self.grab("Press [enter] to return...")
         return
 
     def ssdt_xosi(self):
@@ -2180,7 +2332,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "SsdtUsbx", 0x00001000)
         # Let's see what, if any, the highest version contained in the DSDT is
         highest_osi = None
         for x in self.osi_strings:
-            if self.osi_strings[x] in self.d.get_dsdt_or_only()["table"]:
+            if self.d.table_contains(self.osi_strings[x]):
                 highest_osi = x
         while True:
             lines = [""]
@@ -2196,9 +2348,9 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "SsdtUsbx", 0x00001000)
             lines.append("")
             if self.resize_window:
                 self.u.resize(self.w, max(len(lines)+4,self.h))
-            self.u.head("XOSI")
+            self.head("XOSI")
             print("\n".join(lines))
-            menu = self.u.grab("Please select the latest Windows version for SSDT-XOSI{}:  ".format(
+            menu = self.grab("Please select the latest Windows version for SSDT-XOSI{}:  ".format(
                 " (default is A)" if highest_osi else ""
             ))
             if not len(menu): menu = "a" # Use the default if we passed nothing
@@ -2219,7 +2371,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "SsdtUsbx", 0x00001000)
             break
         if self.resize_window:
             self.u.resize(self.w,self.h)
-        self.u.head("XOSI")
+        self.head("XOSI")
         print("")
         print("Creating SSDT-XOSI with support through {}...".format(target_string))
         ssdt = """DefinitionBlock ("", "SSDT", 2, "CORP", "XOSI", 0x00001000)
@@ -2282,16 +2434,11 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "SsdtUsbx", 0x00001000)
         print("")
         print("Done.")
         self.patch_warn()
-        self.u.grab("Press [enter] to return...")
+        self.grab("Press [enter] to return...")
         return
 
     def get_address_from_line(self, line, split_by="_ADR, ", table=None):
-        if table is None:
-            table = self.d.get_dsdt_or_only()
-        try:
-            return int(table["lines"][line].split(split_by)[1].split(")")[0].replace("Zero","0x0").replace("One","0x1"),16)
-        except:
-            return None
+        return self.s.get_address(line,split_by=split_by,table=table)
 
     def hexy(self,integer,pad_to=0):
         return "0x"+hex(integer)[2:].upper().rjust(pad_to,"0")
@@ -2368,7 +2515,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "SsdtUsbx", 0x00001000)
         paths = {}
         acpi_exclusions = []
         while True:
-            self.u.head("Input Device Path")
+            self.head("Input Device Path")
             print("")
             print("Current Paths:")
             # Retain order to prevent any odd drifting
@@ -2412,7 +2559,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "SsdtUsbx", 0x00001000)
                 print("NOTE:  Currently running as admin on Windows - drag and drop may not work.")
                 print("       Shift + right-click in Explorer and select 'Copy as path' then paste here instead.")
                 print("")
-            path = self.u.grab("Please enter the device path needing bridges:\n\n")
+            path = self.grab("Please enter the device path needing bridges:\n\n")
             if path.lower() == "m":
                 return
             elif path.lower() == "q":
@@ -2448,17 +2595,14 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "SsdtUsbx", 0x00001000)
                 acpi_path = ".".join(acpi_dev)
                 # Search the tables for any matches - only look for actual
                 # Device () definitions though, not Scope () sets as well.
-                matched_devices = []
-                for table_name in self.sorted_nicely(list(self.d.acpi_tables)):
-                    table = self.d.acpi_tables[table_name]
-                    matched_devices += [(x,table_name) for x in self.d.get_device_paths(obj=acpi_path,table=table)]
+                matched_devices = [(x,table_name) for table_name,x in self.d.get_namespace_paths(obj_type="Device",obj=acpi_path)]
                 if matched_devices:
                     # We have at least one matched device
                     if len(matched_devices) > 1:
                         # We have multiples - prompt for which to add
                         bail = False
                         while True:
-                            self.u.head("Multiple Matches")
+                            self.head("Multiple Matches")
                             print("")
                             print("There are {:,} matches for {}:".format(len(matched_devices),acpi_path))
                             print("")
@@ -2468,7 +2612,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "SsdtUsbx", 0x00001000)
                             print("M. Device Path Menu")
                             print("Q. Quit")
                             print("")
-                            d = self.u.grab("Please select the ACPI path to exclude:  ")
+                            d = self.grab("Please select the ACPI path to exclude:  ")
                             if d.lower() == "m":
                                 bail = True
                                 break
@@ -2495,7 +2639,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "SsdtUsbx", 0x00001000)
             if file_path and file_path.lower().endswith(".plist") and os.path.isfile(file_path):
                 # Try loading it
                 file_name = os.path.basename(file_path)
-                self.u.head("Processing {}".format(file_name))
+                self.head("Processing {}".format(file_name))
                 print("")
                 print("Loading {}...".format(file_name))
                 try:
@@ -2504,13 +2648,13 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "SsdtUsbx", 0x00001000)
                 except Exception as e:
                     print(" - Failed to open: {}".format(e))
                     print("")
-                    self.u.grab("Press [enter] to return...")
+                    self.grab("Press [enter] to return...")
                     continue
                 print("Verifying root node type...")
                 if not isinstance(passed_plist,dict):
                     print(" - Invalid type - must be dictionary")
                     print("")
-                    self.u.grab("Press [enter] to return...")
+                    self.grab("Press [enter] to return...")
                     continue
                 print("Gathering device paths...")
                 dp_keys = None
@@ -2528,7 +2672,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "SsdtUsbx", 0x00001000)
                 if not dp_keys or not isinstance(dp_keys,dict):
                     print(" - No device paths located.")
                     print("")
-                    self.u.grab("Press [enter] to return...")
+                    self.grab("Press [enter] to return...")
                     continue
                 print("Iterating {:,} device paths...".format(len(dp_keys)))
                 any_failed = False
@@ -2546,7 +2690,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "SsdtUsbx", 0x00001000)
                     paths[d_path] = None
                 if any_failed:
                     print("")
-                    self.u.grab("Press [enter] to return...")
+                    self.grab("Press [enter] to return...")
                 continue
             # Extract the path and device
             # if specified
@@ -2572,35 +2716,36 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "SsdtUsbx", 0x00001000)
 
     def get_device_paths(self):
         print("Gathering ACPI devices...")
+        # The device paths only depend on the loaded tables - so we can reuse
+        # them for every bridge/device path lookup until those change
+        return self.s.get("device_paths",self._get_device_paths)
+
+    def _get_device_paths(self):
         device_dict = {}
         pci_root_paths = []
         orphaned_devices = []
         sanitized_paths = []
-        for table_name in self.sorted_nicely(list(self.d.acpi_tables)):
+        # Let's gather our roots across all tables - and any other paths that
+        # end in _ADR.  Create our dictionary device paths starting with the
+        # roots.
+        for table_name,path in self.s.get_all_pci_roots():
+            if path[0] in device_dict: continue # Already have it
             table = self.d.acpi_tables[table_name]
-            # Let's gather our roots - and any other paths that and in _ADR
-            pci_roots = self.d.get_device_paths_with_id(_id="PNP0A08",table=table)
-            pci_roots += self.d.get_device_paths_with_id(_id="PNP0A03",table=table)
-            pci_roots += self.d.get_device_paths_with_id(_id="ACPI0016",table=table)
-            paths = self.d.get_path_of_type(obj_type="Name",obj="_ADR",table=table)
-            # Let's create our dictionary device paths - starting with the roots
-            for path in pci_roots:
-                if path[0] in device_dict: continue # Already have it
-                device_uid = self.d.get_name_paths(obj=path[0]+"._UID",table=table)
-                if device_uid and len(device_uid)==1:
-                    adr = self.get_address_from_line(device_uid[0][1],split_by="_UID, ",table=table)
-                else: # Assume 0
-                    adr = 0
-                device_dict[path[0]] = {"path":"PciRoot({})".format(self.hexy(adr))}
-                pci_root_paths.append(device_dict[path[0]])
-            # First - let's create a new list of tuples with the ._ADR stripped
-            # The goal here is to ensure pathing is listed in the proper order.
-            sanitized_paths.extend([(
-                x[0][0:-5], # The path minus the ._ADR/._UID
-                x[1],       # The line number
-                x[2],       # The type of the match (Name, Device, Method, etc)
-                self.get_address_from_line(x[1],table=table) # Address
-            ) for x in paths])
+            device_uid = self.d.get_name_paths(obj=path[0]+"._UID",table=table)
+            if device_uid and len(device_uid)==1:
+                adr = self.get_address_from_line(device_uid[0][1],split_by="_UID, ",table=table)
+            else: # Assume 0
+                adr = 0
+            device_dict[path[0]] = {"path":"PciRoot({})".format(self.hexy(adr))}
+            pci_root_paths.append(device_dict[path[0]])
+        # First - let's create a new list of tuples with the ._ADR stripped
+        # The goal here is to ensure pathing is listed in the proper order.
+        sanitized_paths.extend([(
+            x[0][0:-5], # The path minus the ._ADR/._UID
+            x[1],       # The line number
+            x[2],       # The type of the match (Name, Device, Method, etc)
+            adr         # Address
+        ) for _,x,adr in self.s.get_adr_paths()])
         print("Generating device paths...")
         def check_path(path,device_dict):
             # Returns a bool depending on the checks
@@ -2690,7 +2835,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "SsdtUsbx", 0x00001000)
         if not path_dict: return
         # Break out the paths from any acpi exclusions
         path_dict,acpi_exclusions = path_dict
-        self.u.head("Building Bridges")
+        self.head("Building Bridges")
         print("")
         device_dict,pci_root_paths = self.get_device_paths()
         matches = []
@@ -2725,7 +2870,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "SsdtUsbx", 0x00001000)
             print("")
             print("No matches found!")
             print("")
-            self.u.grab("Press [enter] to return...")
+            self.grab("Press [enter] to return...")
             return
         # Check for, and warn about address overflows
         addr_overflow = []
@@ -2745,7 +2890,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "SsdtUsbx", 0x00001000)
             print("")
             print("No bridges needed!")
             print("")
-            self.u.grab("Press [enter] to return...")
+            self.grab("Press [enter] to return...")
             return
         starting_at = 0
         print("")
@@ -2788,7 +2933,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "SsdtUsbx", 0x00001000)
             print("")
             print("Something went wrong resolving bridges!")
             print("")
-            self.u.grab("Press [enter] to return...")
+            self.grab("Press [enter] to return...")
             return
         print("")
         print("Creating SSDT-Bridge...")
@@ -2948,7 +3093,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "PCIBRG", 0x00000000)
         if addr_overflow:
             self.print_address_overflow(addr_overflow)
         self.patch_warn()
-        self.u.grab("Press [enter] to return...")
+        self.grab("Press [enter] to return...")
         return
 
     def sanitize_acpi_path(self, path):
@@ -2978,7 +3123,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "PCIBRG", 0x00000000)
 
     def get_acpi_path(self):
         while True:
-            self.u.head("Input ACPI Path")
+            self.head("Input ACPI Path")
             print("")
             print("A valid ACPI path will have one of the following formats:")
             print("")
@@ -2988,7 +3133,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "PCIBRG", 0x00000000)
             print("M. Main")
             print("Q. Quit")
             print(" ")
-            path = self.u.grab("Please enter the ACPI path:\n\n")
+            path = self.grab("Please enter the ACPI path:\n\n")
             if path.lower() == "m":
                 return
             if path.lower() == "q":
@@ -3008,7 +3153,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "PCIBRG", 0x00000000)
         test_path = self.get_acpi_path()
         if not test_path: return
         print_path = self.print_acpi_path(test_path)
-        self.u.head("ACPI -> Device Path")
+        self.head("ACPI -> Device Path")
         print("")
         device_dict,_ = self.get_device_paths()
         print("Matching against {}".format(print_path))
@@ -3019,7 +3164,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "PCIBRG", 0x00000000)
         if not p:
             print(" - Not found!")
             print("")
-            self.u.grab("Press [enter] to return...")
+            self.grab("Press [enter] to return...")
             return
         print(" - Matched: {}".format(device_dict[p]["path"]))
         if device_dict[p].get("adr_overflow"):
@@ -3037,14 +3182,14 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "PCIBRG", 0x00000000)
                 for d in sorted(list(set(devs))):
                     print(" --> {}".format(d))
                 print("")
-        self.u.grab("Press [enter] to return...")
+        self.grab("Press [enter] to return...")
         return
 
     def ssdt_pnlf(self):
         if not self.ensure_dsdt(allow_any=True): return
         # Let's get our _UID
         while True:
-            self.u.head("Select _UID for PNLF")
+            self.head("Select _UID for PNLF")
             print("")
             print("_UID |     Supported Platform(s)       | PWMMax")
             print("-----------------------------------------------")
@@ -3062,14 +3207,14 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "PCIBRG", 0x00000000)
             print("M. Main Menu")
             print("Q. Quit")
             print("")
-            menu = self.u.grab("Please select the target _UID value:  ")
+            menu = self.grab("Please select the target _UID value:  ")
             if menu.lower() == "m": return
             elif menu.lower() == "q": self.u.custom_quit()
             try: uid = int(menu)
             except: continue
             if not uid in (14,15,16,17,18,19):
                 while True:
-                    self.u.head("Custom _UID for PNLF")
+                    self.head("Custom _UID for PNLF")
                     print("")
                     print("{} is a custom _UID which may require customization to setup,".format(uid))
                     print("or not have support at all.")
@@ -3077,7 +3222,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "PCIBRG", 0x00000000)
                     print("M. Return to Main Menu")
                     print("Q. Quit")
                     print("")
-                    menu = self.u.grab("Are you sure you want to use it? (y/n):  ")
+                    menu = self.grab("Are you sure you want to use it? (y/n):  ")
                     if menu.lower() == "q":
                         self.u.custom_quit()
                     elif menu.lower() == "m":
@@ -3091,7 +3236,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "PCIBRG", 0x00000000)
         guessed = manual = False
         if uid == 14:
             while True:
-                self.u.head("Arrandale/SNB/IVB _UID")
+                self.head("Arrandale/SNB/IVB _UID")
                 print("")
                 print("Some machines using _UID 14 have problems with max brightness or")
                 print("other issues.  In order to fix these - the iGPU device path must")
@@ -3102,7 +3247,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "PCIBRG", 0x00000000)
                 print("M. Return to Main Menu")
                 print("Q. Quit")
                 print("")
-                gpu_reg = self.u.grab("Would you like to include GPU register code? (y/n):  ")
+                gpu_reg = self.grab("Would you like to include GPU register code? (y/n):  ")
                 if gpu_reg.lower() == "q":
                     self.u.custom_quit()
                 elif gpu_reg.lower() == "m":
@@ -3112,7 +3257,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "PCIBRG", 0x00000000)
                     break
                 elif gpu_reg.lower() == "n":
                     break # Leave the loop
-        self.u.head("Generating PNLF")
+        self.head("Generating PNLF")
         print("")
         print("Creating SSDT-PNLF...")
         print(" - _UID: {}".format(uid))
@@ -3124,9 +3269,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "PCIBRG", 0x00000000)
                 table = self.d.acpi_tables[table_name]
                 print(" Checking {}...".format(table_name))
                 # Try to gather our iGPU device
-                paths = self.d.get_path_of_type(obj_type="Name",obj="_ADR",table=table)
-                for path in paths:
-                    adr = self.get_address_from_line(path[1],table=table)
+                for _,path,adr in self.s.get_adr_paths_for_table(table_name):
                     if adr == 0x00020000:
                         igpu = path[0][:-5]
                         print(" - Found at {}".format(igpu))
@@ -3139,9 +3282,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "PCIBRG", 0x00000000)
                 for table_name in self.sorted_nicely(list(self.d.acpi_tables)):
                     table = self.d.acpi_tables[table_name]
                     print(" Checking {}...".format(table_name))
-                    pci_roots = self.d.get_device_paths_with_id(_id="PNP0A08",table=table)
-                    pci_roots += self.d.get_device_paths_with_id(_id="PNP0A03",table=table)
-                    pci_roots += self.d.get_device_paths_with_id(_id="ACPI0016",table=table)
+                    pci_roots = self.s.get_pci_roots(table=table)
                     external = []
                     for line in table["lines"]:
                         if not line.strip().startswith("External ("): continue # We don't need it
@@ -3174,14 +3315,14 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "PCIBRG", 0x00000000)
             # We need to prompt the user based on what we have
             if igpu:
                 while True:
-                    self.u.head("iGPU Path")
+                    self.head("iGPU Path")
                     print("")
                     print("Found likely iGPU at {}".format(igpu))
                     print("")
                     print("M. Return to Main Menu")
                     print("Q. Quit")
                     print("")
-                    manual_igpu = self.u.grab("Would you like to use this path? (y/n):  ")
+                    manual_igpu = self.grab("Would you like to use this path? (y/n):  ")
                     if manual_igpu.lower() == "q":
                         self.u.custom_quit()
                     elif manual_igpu.lower() == "m":
@@ -3193,7 +3334,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "PCIBRG", 0x00000000)
                         break # Leave the loop
             if not igpu:
                 while True:
-                    self.u.head("Custom iGPU Path")
+                    self.head("Custom iGPU Path")
                     print("")
                     if not guessed:
                         print("No valid iGPU path was found in the passed ACPI table(s).\n")
@@ -3206,7 +3347,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "PCIBRG", 0x00000000)
                     print("M. Return to Main Menu")
                     print("Q. Quit")
                     print("")
-                    manual_igpu = self.u.grab("Please type the iGPU path to use:  ")
+                    manual_igpu = self.grab("Please type the iGPU path to use:  ")
                     if manual_igpu.lower() == "q":
                         self.u.custom_quit()
                     elif manual_igpu.lower() == "m":
@@ -3225,7 +3366,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "PCIBRG", 0x00000000)
                         guessed = False
                         manual  = True
                         break
-            self.u.head("Generating PNLF")
+            self.head("Generating PNLF")
             print("")
             print("Creating SSDT-PNLF...")
             print(" - _UID: {}".format(uid))
@@ -3237,7 +3378,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "PCIBRG", 0x00000000)
         # Check all tables for PNLF and generate an XNLF rename if found
         for table_name in self.sorted_nicely(list(self.d.acpi_tables)):
             table = self.d.acpi_tables[table_name]
-            if "PNLF" in table["table"]:
+            if self.d.table_contains("PNLF",table=table):
                 print("PNLF detected in {} - generating rename...".format(table_name))
                 patches.append({
                     "Comment":"PNLF to XNLF Rename",
@@ -3440,7 +3581,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "PNLF", 0x00000000)
         print("")
         print("Done.")
         self.patch_warn()
-        self.u.grab("Press [enter] to return...")
+        self.grab("Press [enter] to return...")
         return
 
     def fix_dmar(self):
@@ -3448,7 +3589,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "PNLF", 0x00000000)
         if not dmar:
             d = None
             while True:
-                self.u.head("Select DMAR Table")
+                self.head("Select DMAR Table")
                 print(" ")
                 if self.copy_as_path:
                     print("NOTE:  Currently running as admin on Windows - drag and drop may not work.")
@@ -3457,14 +3598,14 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "PNLF", 0x00000000)
                 print("M. Main")
                 print("Q. Quit")
                 print(" ")
-                dmar = self.u.grab("Please drag and drop a DMAR table here:  ")
+                dmar = self.grab("Please drag and drop a DMAR table here:  ")
                 if dmar.lower() == "m":
                     return
                 if dmar.lower() == "q":
                     self.u.custom_quit()
                 out = self.u.check_path(dmar)
                 if not out: continue
-                self.u.head("Loading DMAR Table")
+                self.head("Loading DMAR Table")
                 print("")
                 print("Loading {}...".format(os.path.basename(out)))
                 if d is None:
@@ -3474,7 +3615,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "PNLF", 0x00000000)
                 dmar = d.get_table_with_signature("DMAR")
                 if not dmar: continue
                 break
-        self.u.head("Patching DMAR")
+        self.head("Patching DMAR")
         print("")
         print("Verifying signature...")
         reserved = got_sig = False
@@ -3519,14 +3660,14 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "PNLF", 0x00000000)
         if not got_sig:
             print(" - Not found, does not appear to be a valid DMAR table.")
             print("")
-            self.u.grab("Press [enter] to return...")
+            self.grab("Press [enter] to return...")
             return
         # Give the user some feedback
         if not region_count:
             # None found
             print("No Reserved Memory Regions found - DMAR does not need patching.")
             print("")
-            self.u.grab("Press [enter] to return to main menu...")
+            self.grab("Press [enter] to return to main menu...")
             return
         # We removed some regions
         print("Located {:,} Reserved Memory Region{} - generating new table...".format(region_count,"" if region_count==1 else "s"))
@@ -3545,39 +3686,22 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "PNLF", 0x00000000)
         print("")
         print("Done.")
         self.patch_warn()
-        self.u.grab("Press [enter] to return...")
+        self.grab("Press [enter] to return...")
         return
 
     def get_dev_at_adr(self,target_adr=0x001F0004,exclude_names=("XHC",)):
         # Helper to walk tables looking for device + parent at a
         # provided address
-        for table_name in self.sorted_nicely(list(self.d.acpi_tables)):
-            table = self.d.acpi_tables[table_name]
-            paths = self.d.get_path_of_type(obj_type="Name",obj="_ADR",table=table)
-            for path in paths:
-                adr = self.get_address_from_line(path[1],table=table)
-                # Check by address
-                # - Intel tables seem to have it at 0x001F0004
-                # - AMD tables seem to have it at 0x00140000
-                #   Though this matches Intel chipset USB 3 controllers
-                #   so we'll need to also check names and such.
-                if adr == target_adr:
-                    # Ensure our path minus ._ADR is not top level, that we
-                    # didn't match any devices with "XHC" in their name, and
-                    # then return the path + parent path + table name
-                    path_parts = path[0].split(".")[:-1]
-                    if len(path_parts) > 1:
-                        # Make sure we account for any excluded names
-                        if exclude_names is None or not \
-                        any(x.lower() in path_parts[-1].lower() for x in exclude_names):
-                            _path = ".".join(path_parts)
-                            _parent = ".".join(path_parts[:-1])
-                            return (_path,_parent,table_name)
+        # - Intel tables seem to have it at 0x001F0004
+        # - AMD tables seem to have it at 0x00140000
+        #   Though this matches Intel chipset USB 3 controllers
+        #   so we'll need to also check names and such.
+        return self.s.get_dev_at_adr(target_adr=target_adr,exclude_names=exclude_names)
 
     def smbus(self):
         if not self.ensure_dsdt():
             return
-        self.u.head("SMBus")
+        self.head("SMBus")
         print("")
         print("Gathering potential bus devices...")
         bus_path = bus_parent = None
@@ -3621,7 +3745,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "PNLF", 0x00000000)
             # Never found it - report the error and bail
             print(" - Could not locate a valid bus device! Aborting.")
             print("")
-            self.u.grab("Press [enter] to return to main menu...")
+            self.grab("Press [enter] to return to main menu...")
             return
         # Break out our vars
         bus_path,bus_parent,table_name = bus_check
@@ -3728,13 +3852,13 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "SBUSMCHC", 0x00000000)
         print("")
         print("Done.")
         self.patch_warn()
-        self.u.grab("Press [enter] to return...")
+        self.grab("Press [enter] to return...")
         return
 
     def ambient_light_sensor(self):
         if not self.ensure_dsdt():
             return
-        self.u.head("Ambient Light Sensor")
+        self.head("Ambient Light Sensor")
         print("")
         print("Locating ACPI0008 (ALS) devices...")
         for table_name in self.sorted_nicely(list(self.d.acpi_tables)):
@@ -3742,7 +3866,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "SBUSMCHC", 0x00000000)
             print(" Checking {}...".format(table_name))
             # Try to find any ambient light sensor devices in the
             # current table
-            als = self.d.get_device_paths_with_hid("ACPI0008",table=table)
+            als = self.s.get_device_paths_with_hid("ACPI0008",table=table)
             if als:
                 print(" - Found at {}".format(als[0][0]))
                 print(" --> No fake needed!")
@@ -3801,14 +3925,14 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "ALS0", 0x00000000)
                         print("")
                         print("Done.")
                         self.patch_warn()
-                        self.u.grab("Press [enter] to return...")
+                        self.grab("Press [enter] to return...")
                         return
                     else:
                         print(" --> _STA properly enabled - no patching needed!")
                 else:
                     print(" --> Not found - no patching needed!")
                 print("")
-                self.u.grab("Press [enter] to return to main menu...")
+                self.grab("Press [enter] to return to main menu...")
                 return
         # If we got here - we didn't find any
         print("No ACPI0008 (ALS) devices found - fake needed...")
@@ -3858,7 +3982,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "ALS0", 0x00000000)
         print("")
         print("Done.")
         self.patch_warn()
-        self.u.grab("Press [enter] to return...")
+        self.grab("Press [enter] to return...")
         return
 
     def imei_bridge(self):
@@ -3877,7 +4001,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "ALS0", 0x00000000)
             print(line)
             lines.append(line)
             return lines
-        self.u.head("IMEI Bridge")
+        self.head("IMEI Bridge")
         lines = print_line("")
         lines = print_line("Locating IMEI devices at address 0x00160000...",lines)
         imei = self.get_dev_at_adr(0x00160000)
@@ -3887,7 +4011,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "ALS0", 0x00000000)
             ))
             print(" --> No bridge needed!")
             fake_note()
-            self.u.grab("Press [enter] to return to main menu...")
+            self.grab("Press [enter] to return to main menu...")
             return
         # We didn't find it
         lines = print_line(" - Not located - bridge needed",lines)
@@ -3898,18 +4022,12 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "ALS0", 0x00000000)
         if not igpu:
             lines = print_line(" --> Not located!",lines)
             lines = print_line(" - Attempting to locate PCI Roots...",lines)
-            pci_roots = []
-            for table_name in self.sorted_nicely(list(self.d.acpi_tables)):
-                table = self.d.acpi_tables[table_name]
-                pci_roots = self.d.get_device_paths_with_id(_id="PNP0A08",table=table)
-                pci_roots += self.d.get_device_paths_with_id(_id="PNP0A03",table=table)
-                pci_roots += self.d.get_device_paths_with_id(_id="ACPI0016",table=table)
-                if pci_roots:
-                    break # Bail on the first match
+            # Take the roots from the first table that has any
+            pci_roots = next((x[1] for x in self.d.get_namespace_paths_with_id(("PNP0A08","PNP0A03","ACPI0016"),by_table=True)),[])
             if not pci_roots:
                 print(" --> None found!  Cannot continue.")
                 print("")
-                self.u.grab("Press [enter] to reeturn to main menu...")
+                self.grab("Press [enter] to reeturn to main menu...")
                 return
             parent = pci_roots[0][0]
             lines = print_line(" --> Located at {}".format(parent),lines)
@@ -3921,7 +4039,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "ALS0", 0x00000000)
         # Ask the user what approach they're using
         approach = None
         while True:
-            self.u.head("Fake Device-ID")
+            self.head("Fake Device-ID")
             print("")
             print("Select your current CPU and chipset configuration:")
             print("")
@@ -3932,7 +4050,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "ALS0", 0x00000000)
             print("M. Main Menu")
             print("Q. Quit")
             print("")
-            m = self.u.grab("Please select an option:  ")
+            m = self.grab("Please select an option:  ")
             if not m: continue
             if m.lower() == "m":
                 return
@@ -3943,7 +4061,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "ALS0", 0x00000000)
             approach = {"1":1,"2":2}.get(m)
             break
         # Restore the lines up to this point
-        self.u.head("IMEI Bridge")
+        self.head("IMEI Bridge")
         print("\n".join(lines))
         if approach is None:
             print(" - Only building bridge, must fake using DeviceProperties!")
@@ -3997,12 +4115,12 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "IMEI", 0x00000000)
             print("")
         print("Done.")
         self.patch_warn()
-        self.u.grab("Press [enter] to return...")
+        self.grab("Press [enter] to return...")
         return
 
     def pick_match_mode(self):
         while True:
-            self.u.head("Select OpenCore Match Mode")
+            self.head("Select OpenCore Match Mode")
             print("")
             print("1. {}:".format(self.match_dict[0]))
             print("   - Signature/Table ID Matching: {} ANY {}".format(self.red,self.rst))
@@ -4023,7 +4141,7 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "IMEI", 0x00000000)
             print("M. Return to Menu")
             print("Q. Quit")
             print("")
-            menu = self.u.grab("Please select an option:  ")
+            menu = self.grab("Please select an option:  ")
             if not len(menu):
                 continue
             elif menu.lower() == "m":
@@ -4034,6 +4152,25 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "IMEI", 0x00000000)
                 self.match_mode = int(menu)-1
                 return
 
+    def clear_cache(self):
+        self.head("Clear Disassembly Cache")
+        print("")
+        entries,size = self.d.cache.get_stats()
+        if not entries:
+            print("The disassembly cache is already empty.")
+        else:
+            print("Removing {:,} cached table{} ({:,.1f} MB)...".format(
+                entries,
+                "" if entries == 1 else "s",
+                size/1024.0/1024.0
+            ))
+            if self.d.clear_cache():
+                print(" - Done.")
+            else:
+                print(" - Failed to remove {}".format(self.d.cache.cache_dir))
+        print("")
+        self.grab("Press [enter] to return...")
+
     def main(self):
         cwd = os.getcwd()
         lines=[""]
@@ -4076,6 +4213,8 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "IMEI", 0x00000000)
         if self.d.iasl_legacy:
             lines.append("L. Use Legacy Compiler for macOS 10.6 and prior: {}".format("{}!! Enabled !!{}".format(self.yel,self.rst) if self.iasl_legacy else "Disabled"))
         lines.append("D. Select ACPI table or folder containing tables")
+        lines.append("K. Clear Disassembly Cache")
+        lines.append("N. Native AML Path/Id Lookups: {}".format("Enabled" if self.d.use_aml else "Disabled"))
         lines.append("M. OpenCore Match Mode: {}".format(
             self.match_dict.get(self.match_mode,list(self.match_dict)[0])
         ))
@@ -4084,9 +4223,9 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "IMEI", 0x00000000)
         lines.append("")
         if self.resize_window:
             self.u.resize(self.w,max(self.h,len(lines)+4))
-        self.u.head()
+        self.head()
         print("\n".join(lines))
-        menu = self.u.grab("Please make a selection:  ")
+        menu = self.grab("Please make a selection:  ")
         if not len(menu):
             return
         if self.resize_window:
@@ -4129,14 +4268,17 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "IMEI", 0x00000000)
         elif menu.lower() == "g":
             self.imei_bridge()
         elif menu.lower() == "p" and (sys.platform.startswith("linux") or sys.platform == "win32"):
-            output_folder = os.path.join(os.path.dirname(os.path.realpath(__file__)),self.output)
-            acpi_name = self.get_unique_name("OEM",output_folder,name_append="")
-            self.dsdt = self.load_dsdt(
-                self.d.dump_tables(os.path.join(output_folder,acpi_name))
-            )
+            self.dsdt = self.dump_dsdt()
         elif menu.lower() == "l" and self.d.iasl_legacy:
             self.iasl_legacy = not self.iasl_legacy
             self.save_settings()
+        elif menu.lower() == "k":
+            self.clear_cache()
+        elif menu.lower() == "n":
+            self.d.use_aml ^= True
+            # Anything we gathered came from the other lookups
+            self.s.reset()
+            self.save_settings()
         elif menu.lower() == "m":
             self.pick_match_mode()
             self.save_settings()
@@ -4145,9 +4287,116 @@ DefinitionBlock ("", "SSDT", 2, "CORP", "IMEI", 0x00000000)
             self.save_settings()
         return
 
+def run_batch_job(job):
+    # Runs a single dump for batch mode - job is a tuple of
+    # (path, output, generators, answers, log_path, jobs, reveal, use_aml)
+    path, output, generators, answers, log_path, jobs, reveal, use_aml = job
+    stdout = sys.stdout
+    log = None
+    if log_path:
+        # Send everything to the log file so concurrent jobs don't
+        # interleave their output
+        log = open(log_path,"w")
+        sys.stdout = log
+    try:
+        s = SSDT(interactive=False, output=output, jobs=jobs, defer_compile=True, reveal=reveal, use_aml=use_aml)
+        errors = s.run_batch(path, generators, answers)
+    except SystemExit:
+        errors = [("Setup","Failed to initialize")]
+    except Exception as e:
+        errors = [("Setup",str(e))]
+    finally:
+        if log:
+            sys.stdout = stdout
+            log.close()
+    return (path, output, errors)
+
+def batch(dumps, generators, answers=None, output=None, jobs=1, reveal=False, use_aml=False):
+    # Processes each of the passed dumps, saving the results of each in its own
+    # folder within output - returns 0 if everything succeeded, 1 otherwise
+    output = os.path.abspath(output or os.path.join(os.path.dirname(os.path.realpath(__file__)),"Results"))
+    if not os.path.isdir(output):
+        os.makedirs(output)
+    job_list = []
+    used_names = []
+    for dump in dumps:
+        # Name each output folder after its dump - ensuring they're unique
+        name = os.path.basename(os.path.normpath(os.path.abspath(dump))) or "ACPI"
+        check_name = name
+        num = 1
+        while check_name.lower() in used_names or os.path.exists(os.path.join(output,check_name)):
+            check_name = "{}-{}".format(name,num)
+            num += 1
+        used_names.append(check_name.lower())
+        dump_output = os.path.join(output,check_name)
+        os.makedirs(dump_output)
+        job_list.append((
+            os.path.abspath(dump),
+            dump_output,
+            generators,
+            answers,
+            os.path.join(dump_output,"SSDTTime.log") if jobs > 1 else None,
+            # A lone dump gets all the jobs for disassembling and compiling
+            jobs if len(dumps) == 1 else 1,
+            reveal,
+            use_aml
+        ))
+    if jobs > 1 and len(job_list) > 1:
+        pool = multiprocessing.Pool(min(jobs,len(job_list)))
+        try:
+            results = pool.map(run_batch_job,job_list)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = [run_batch_job(job) for job in job_list]
+    print("")
+    print("Processed {:,} dump{}:".format(len(results),"" if len(results)==1 else "s"))
+    failed = False
+    for path,dump_output,errors in results:
+        print(" - {} -> {}".format(path,dump_output))
+        for name,error in errors:
+            failed = True
+            print(" --> {} failed: {}".format(name,error))
+    return 1 if failed else 0
+
 if __name__ == '__main__':
+    # Setup the cli args
+    parser = argparse.ArgumentParser(prog="SSDTTime.py", description="SSDTTime - py script to create SSDTs and patches from ACPI tables.")
+    parser.add_argument("dumps", nargs="*", help="ACPI table folders (or tables) to process without interaction - requires -g")
+    parser.add_argument("-g", "--generators", nargs="+", help="generators to run on each dump, in order - any of: {}".format(", ".join(x[0] for x in BATCH_GENERATORS)))
+    parser.add_argument("-a", "--answer", action="append", default=[], help="queue an answer for a generator's prompts as GENERATOR=VALUE - can be passed multiple times, answers are used in order")
+    parser.add_argument("-o", "--output", help="folder to save results in - each dump gets its own subfolder (default is Results)")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="number of dumps to process at once (default is 1)")
+    parser.add_argument("-r", "--reveal", action="store_true", help="reveal each dump's results folder once its SSDTs are compiled (macOS only)")
+    parser.add_argument("-n", "--native-aml", action="store_true", help="answer path and id lookups by decoding the tables' AML directly instead of reading iasl's listings")
+
+    args = parser.parse_args()
+
+    if args.dumps or args.generators:
+        # We're in non-interactive mode here
+        if not args.dumps or not args.generators:
+            parser.error("dumps and -g/--generators must be passed together")
+        generators = []
+        for g in args.generators:
+            generator = get_batch_generator(g)
+            if not generator:
+                parser.error("unknown generator: {}".format(g))
+            generators.append(generator[0])
+        answers = {}
+        for a in args.answer:
+            if not "=" in a:
+                parser.error("answers must be formatted as GENERATOR=VALUE: {}".format(a))
+            name,value = a.split("=",1)
+            generator = get_batch_generator(name)
+            if not generator:
+                parser.error("unknown generator: {}".format(name))
+            answers.setdefault(generator[0],[]).append(value)
+        exit(batch(args.dumps, generators, answers=answers, output=args.output, jobs=args.jobs, reveal=args.reveal, use_aml=args.native_aml))
+
+    # Interactive mode
     if 2/3 == 0: input = raw_input
-    s = SSDT()
+    s = SSDT(use_aml=args.native_aml)
     while True:
         try:
             s.main()
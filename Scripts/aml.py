@@ -0,0 +1,358 @@
+import binascii
+
+class AMLError(Exception):
+    pass
+
+class AML:
+
+    def __init__(self):
+        # Size of the ACPI table header that precedes the AML byte stream
+        self.header_length = 36
+        # Argument layouts for the fixed-length opcodes we don't need to treat
+        # specially:
+        #
+        # T = TermArg, S = SuperName/Target, N = NameString,
+        # b = byte, w = word, d = dword, q = qword
+        self.ops = {
+            0x00:"", 0x01:"", 0xFF:"",
+            0x06:"NN",
+            0x0A:"b", 0x0B:"w", 0x0C:"d", 0x0E:"q",
+            0x60:"", 0x61:"", 0x62:"", 0x63:"", 0x64:"", 0x65:"", 0x66:"", 0x67:"",
+            0x68:"", 0x69:"", 0x6A:"", 0x6B:"", 0x6C:"", 0x6D:"", 0x6E:"",
+            0x70:"TS", 0x71:"S", 0x72:"TTS", 0x73:"TTS", 0x74:"TTS", 0x75:"S",
+            0x76:"S", 0x77:"TTS", 0x78:"TTSS", 0x79:"TTS", 0x7A:"TTS", 0x7B:"TTS",
+            0x7C:"TTS", 0x7D:"TTS", 0x7E:"TTS", 0x7F:"TTS", 0x80:"TS", 0x81:"TS",
+            0x82:"TS", 0x83:"T", 0x84:"TTS", 0x85:"TTS", 0x86:"ST", 0x87:"S",
+            0x88:"TTS", 0x89:"TbTbTT", 0x8A:"TTN", 0x8B:"TTN", 0x8C:"TTN",
+            0x8D:"TTN", 0x8E:"S", 0x8F:"TTN", 0x90:"TT", 0x91:"TT", 0x92:"T",
+            0x93:"TT", 0x94:"TT", 0x95:"TT", 0x96:"TS", 0x97:"TS", 0x98:"TS",
+            0x99:"TS", 0x9C:"TTS", 0x9D:"TS", 0x9E:"TTTS", 0x9F:"", 0xA3:"",
+            0xA4:"T", 0xA5:"", 0xCC:""
+        }
+        # Same as above, but for opcodes following the 0x5B prefix
+        self.ext_ops = {
+            0x01:"Nb", 0x02:"N", 0x12:"SS", 0x13:"TTTN", 0x1F:"TTTTTT", 0x20:"NS",
+            0x21:"T", 0x22:"T", 0x23:"Sw", 0x24:"S", 0x25:"ST", 0x26:"S",
+            0x27:"S", 0x28:"TS", 0x29:"TS", 0x2A:"S", 0x30:"", 0x31:"",
+            0x32:"bdT", 0x33:"", 0x80:"NbTT", 0x88:"NTTT"
+        }
+        # Field style opcodes that only define field units - we skip these
+        # wholesale using their PkgLength
+        self.field_ops = (0x81,0x86,0x87)
+        # Names whose values we keep track of - _HID and _CID integers are
+        # compressed EisaIds
+        self.id_names = ("_HID","_CID","_ADR","_UID")
+        self.eisa_names = ("_HID","_CID")
+        self.lead_chars = bytearray(b"ABCDEFGHIJKLMNOPQRSTUVWXYZ_")
+        self.name_chars = bytearray(b"ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_")
+
+    def parse(self, data):
+        # Walks the AML in the passed table and returns a dict containing:
+        #
+        # paths:     sorted (path, offset, type) tuples - in the same format
+        #            DSDT.get_paths() uses, with the byte offset of the opcode
+        #            in place of the line number
+        # ids:       dict of device path -> {"_HID":..., "_CID":[...], ...}
+        # methods:   dict of path -> argument count, including Externals
+        # errors:    list of (offset, message) tuples for anything we had to
+        #            skip over
+        self.data = bytearray(data)
+        if len(self.data) < self.header_length:
+            raise AMLError("Table is too short to contain a header")
+        end = min(len(self.data),int(binascii.hexlify(bytes(self.data[7:3:-1])),16))
+        if end < self.header_length:
+            raise AMLError("Table length in header is too short")
+        # Method invocations don't encode their argument count - so we need to
+        # know every method before we can walk the method bodies correctly.
+        # Keep walking until we stop finding new methods.
+        self.methods = {}
+        for _ in range(3):
+            count = len(self.methods)
+            self._walk(end)
+            if len(self.methods) == count:
+                break
+        return {
+            "paths":   sorted(self.paths),
+            "ids":     self.ids,
+            "methods": dict((self.get_path_string(k),v) for k,v in self.methods.items()),
+            "errors":  self.errors
+        }
+
+    def _walk(self, end):
+        self.paths  = []
+        self.ids    = {}
+        self.errors = []
+        try:
+            self.parse_term_list(self.header_length,end,(),())
+        except AMLError as e:
+            self.errors.append((self.header_length,str(e)))
+
+    def get_path_string(self, segs):
+        # Matches the formatting iasl uses in its listings - trailing
+        # underscores are stripped, and paths are fully qualified
+        return "\\"+".".join([x.rstrip("_") for x in segs])
+
+    def eisa_id(self, value):
+        # Decodes a compressed EisaId - returning None if it's not valid
+        if not isinstance(value,int) or not 0 <= value <= 0xFFFFFFFF:
+            return None
+        value = ((value & 0xFF) << 24) | ((value >> 8 & 0xFF) << 16) | ((value >> 16 & 0xFF) << 8) | (value >> 24 & 0xFF)
+        if value & 0x80000000:
+            return None
+        chars = [((value >> x) & 0x1F) + 0x40 for x in (26,21,16)]
+        if not all(0x41 <= c <= 0x5A for c in chars):
+            return None
+        return "".join(chr(c) for c in chars)+"{:04X}".format(value & 0xFFFF)
+
+    def _check(self, pos, end, size=1):
+        if pos+size > end:
+            raise AMLError("Unexpected end of data at 0x{:X}".format(pos))
+
+    def get_int(self, pos, size, end):
+        self._check(pos,end,size)
+        value = 0
+        for i in range(size):
+            value |= self.data[pos+i] << (8*i)
+        return (value,pos+size)
+
+    def parse_pkg_length(self, pos, end):
+        # Returns the end of the package and the position after the PkgLength
+        self._check(pos,end)
+        lead = self.data[pos]
+        count = lead >> 6
+        if not count:
+            return (pos+(lead & 0x3F),pos+1)
+        self._check(pos,end,count+1)
+        length = lead & 0x0F
+        for i in range(count):
+            length |= self.data[pos+1+i] << (4+8*i)
+        pkg_end = pos+length
+        if pkg_end > end:
+            raise AMLError("PkgLength at 0x{:X} runs past its parent".format(pos))
+        return (pkg_end,pos+count+1)
+
+    def _name_seg(self, pos, end):
+        self._check(pos,end,4)
+        seg = self.data[pos:pos+4]
+        if not seg[0] in self.lead_chars or not all(x in self.name_chars for x in seg[1:]):
+            raise AMLError("Invalid NameSeg at 0x{:X}".format(pos))
+        return seg.decode("ascii") if 2/3!=0 else str(seg)
+
+    def is_name_start(self, byte):
+        return byte in (0x5C,0x5E,0x2E,0x2F) or byte in self.lead_chars
+
+    def parse_name_string(self, pos, end):
+        # Returns a tuple of ((root, parents, segments), new position)
+        self._check(pos,end)
+        root = False
+        parents = 0
+        if self.data[pos] == 0x5C:
+            root = True
+            pos += 1
+        else:
+            while pos < end and self.data[pos] == 0x5E:
+                parents += 1
+                pos += 1
+        self._check(pos,end)
+        prefix = self.data[pos]
+        if prefix == 0x00: # NullName
+            return ((root,parents,()),pos+1)
+        if prefix == 0x2E: # DualNamePrefix
+            count = 2
+            pos += 1
+        elif prefix == 0x2F: # MultiNamePrefix
+            self._check(pos,end,2)
+            count = self.data[pos+1]
+            pos += 2
+        else:
+            count = 1
+        segs = tuple(self._name_seg(pos+4*i,end) for i in range(count))
+        return ((root,parents,segs),pos+4*count)
+
+    def resolve(self, name, scope):
+        # Returns the absolute path of the passed name relative to scope
+        root,parents,segs = name
+        if root:
+            return segs
+        return scope[:max(0,len(scope)-parents)]+segs
+
+    def get_method_args(self, name, scope):
+        # Resolves a reference to a method using the namespace search rules,
+        # returning the argument count - or None if it's not a method
+        root,parents,segs = name
+        if not segs:
+            return None
+        if root or parents or len(segs) > 1:
+            return self.methods.get(self.resolve(name,scope))
+        for i in range(len(scope),-1,-1):
+            args = self.methods.get(scope[:i]+segs)
+            if args is not None:
+                return args
+        return None
+
+    def parse_term_list(self, pos, end, scope, path_scope):
+        while pos < end:
+            pos = self.parse_term(pos,end,scope,path_scope)
+        return pos
+
+    def parse_block(self, pos, end, scope, path_scope):
+        # Walks a term list bounded by a PkgLength - if anything goes wrong,
+        # we note it and move on to the end of the block
+        try:
+            self.parse_term_list(pos,end,scope,path_scope)
+        except AMLError as e:
+            self.errors.append((pos,str(e)))
+        return end
+
+    def parse_args(self, spec, pos, end, scope, path_scope):
+        for arg in spec:
+            if arg == "T":
+                pos = self.parse_term(pos,end,scope,path_scope)
+            elif arg == "S":
+                pos = self.parse_super_name(pos,end,scope,path_scope)
+            elif arg == "N":
+                pos = self.parse_name_string(pos,end)[1]
+            else:
+                pos = self.get_int(pos,{"b":1,"w":2,"d":4,"q":8}[arg],end)[1]
+        return pos
+
+    def parse_super_name(self, pos, end, scope, path_scope):
+        # Targets and SuperNames can be names, locals/args, Debug, or a
+        # reference op - names here are never method invocations
+        self._check(pos,end)
+        byte = self.data[pos]
+        if byte == 0x00:
+            return pos+1 # NullName
+        if self.is_name_start(byte):
+            return self.parse_name_string(pos,end)[1]
+        return self.parse_term(pos,end,scope,path_scope)
+
+    def parse_string(self, pos, end):
+        start = pos
+        while pos < end and self.data[pos] != 0x00:
+            pos += 1
+        self._check(pos,end)
+        value = self.data[start:pos]
+        return (value.decode("ascii","ignore") if 2/3!=0 else str(value),pos+1)
+
+    def parse_data(self, pos, end, scope, path_scope):
+        # Returns the value of a simple data object - ints, strings, and
+        # packages of those - or None for anything else
+        self._check(pos,end)
+        op = self.data[pos]
+        if op in (0x00,0x01):
+            return (op,pos+1)
+        if op == 0xFF:
+            return (0xFFFFFFFFFFFFFFFF,pos+1)
+        if op in (0x0A,0x0B,0x0C,0x0E):
+            return self.get_int(pos+1,{0x0A:1,0x0B:2,0x0C:4,0x0E:8}[op],end)
+        if op == 0x0D:
+            return self.parse_string(pos+1,end)
+        if op == 0x12:
+            pkg_end,p = self.parse_pkg_length(pos+1,end)
+            p += 1 # Skip NumElements
+            values = []
+            try:
+                while p < pkg_end:
+                    value,p = self.parse_data(p,pkg_end,scope,path_scope)
+                    values.append(value)
+            except AMLError:
+                pass
+            return (values,pkg_end)
+        return (None,self.parse_term(pos,end,scope,path_scope))
+
+    def add_path(self, name, offset, obj_type, scope, path_scope):
+        # Returns the absolute namespace path of the object, and the path as
+        # it'd appear in a listing
+        path = self.resolve(name,scope)
+        list_path = self.resolve(name,path_scope)
+        if list_path:
+            self.paths.append((self.get_path_string(list_path),offset,obj_type))
+        return (path,list_path)
+
+    def parse_term(self, pos, end, scope, path_scope):
+        self._check(pos,end)
+        start = pos
+        op = self.data[pos]
+        pos += 1
+        if op == 0x5B: # ExtOpPrefix
+            self._check(pos,end)
+            ext = self.data[pos]
+            pos += 1
+            if ext in self.ext_ops:
+                return self.parse_args(self.ext_ops[ext],pos,end,scope,path_scope)
+            if ext in self.field_ops:
+                return self.parse_pkg_length(pos,end)[0]
+            if ext in (0x82,0x83,0x84,0x85):
+                # Device, Processor, PowerResource, and ThermalZone
+                pkg_end,pos = self.parse_pkg_length(pos,end)
+                name,pos = self.parse_name_string(pos,pkg_end)
+                # Skip the fixed-size fields after the name
+                pos += {0x82:0,0x83:6,0x84:3,0x85:0}[ext]
+                self._check(pos,pkg_end,0)
+                if ext in (0x82,0x83):
+                    path,list_path = self.add_path(name,start,"Device" if ext == 0x82 else "Processor",scope,path_scope)
+                else:
+                    # iasl listings don't treat PowerResource or ThermalZone
+                    # as part of the path - keep our paths consistent
+                    path,list_path = self.resolve(name,scope),path_scope
+                return self.parse_block(pos,pkg_end,path,list_path)
+            raise AMLError("Unknown opcode 0x5B{:02X} at 0x{:X}".format(ext,start))
+        if self.is_name_start(op):
+            # A name reference, or a method invocation
+            name,pos = self.parse_name_string(start,end)
+            args = self.get_method_args(name,scope)
+            for _ in range(args or 0):
+                pos = self.parse_term(pos,end,scope,path_scope)
+            return pos
+        if op in self.ops:
+            return self.parse_args(self.ops[op],pos,end,scope,path_scope)
+        if op == 0x0D: # String
+            return self.parse_string(pos,end)[1]
+        if op == 0x08: # Name
+            name,pos = self.parse_name_string(pos,end)
+            path,list_path = self.add_path(name,start,"Name",scope,path_scope)
+            value,pos = self.parse_data(pos,end,scope,path_scope)
+            if path and path[-1] in self.id_names and value is not None:
+                if path[-1] in self.eisa_names:
+                    # Decode any EisaIds
+                    values = value if isinstance(value,list) else [value]
+                    values = [self.eisa_id(x) or x if isinstance(x,int) else x for x in values]
+                    value = values if isinstance(value,list) else values[0]
+                if path[-1] == "_CID" and not isinstance(value,list):
+                    value = [value]
+                self.ids.setdefault(self.get_path_string(list_path[:-1]),{})[path[-1]] = value
+            return pos
+        if op == 0x10: # Scope
+            pkg_end,pos = self.parse_pkg_length(pos,end)
+            name,pos = self.parse_name_string(pos,pkg_end)
+            return self.parse_block(pos,pkg_end,self.resolve(name,scope),self.resolve(name,path_scope))
+        if op == 0x14: # Method
+            pkg_end,pos = self.parse_pkg_length(pos,end)
+            name,pos = self.parse_name_string(pos,pkg_end)
+            flags,pos = self.get_int(pos,1,pkg_end)
+            path,list_path = self.add_path(name,start,"Method",scope,path_scope)
+            self.methods[path] = flags & 0x07
+            return self.parse_block(pos,pkg_end,path,list_path)
+        if op == 0x15: # External
+            name,pos = self.parse_name_string(pos,end)
+            obj_type,pos = self.get_int(pos,1,end)
+            args,pos = self.get_int(pos,1,end)
+            path = self.resolve(name,scope)
+            if obj_type == 0x08 and not path in self.methods:
+                self.methods[path] = args & 0x07
+            return pos
+        if op in (0x11,0x12,0x13): # Buffer, Package, VarPackage
+            return self.parse_pkg_length(pos,end)[0]
+        if op in (0xA0,0xA2): # If, While
+            pkg_end,pos = self.parse_pkg_length(pos,end)
+            try:
+                pos = self.parse_term(pos,pkg_end,scope,path_scope)
+            except AMLError as e:
+                self.errors.append((pos,str(e)))
+                return pkg_end
+            return self.parse_block(pos,pkg_end,scope,path_scope)
+        if op == 0xA1: # Else
+            pkg_end,pos = self.parse_pkg_length(pos,end)
+            return self.parse_block(pos,pkg_end,scope,path_scope)
+        raise AMLError("Unknown opcode 0x{:02X} at 0x{:X}".format(op,start))
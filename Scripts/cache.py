@@ -0,0 +1,119 @@
+import os, sys, json, hashlib, shutil
+
+class Cache:
+
+    def __init__(self, cache_dir = None, max_size = 256*1024*1024):
+        # Default to a folder in the user's cache directory - so we never
+        # write into the install itself
+        self.cache_dir = cache_dir or self.get_default_dir()
+        # Max size in bytes - the least recently used entries are removed
+        # once we go over this.  Anything <= 0 disables the cap.
+        self.max_size = max_size
+        self.ext = ".json"
+
+    def get_default_dir(self, name = "SSDTTime"):
+        # Returns the per-user cache folder for the current platform
+        if os.name == "nt":
+            base = os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"),"AppData","Local")
+            return os.path.join(base,name,"Cache")
+        if sys.platform == "darwin":
+            return os.path.join(os.path.expanduser("~"),"Library","Caches",name)
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"),".cache")
+        return os.path.join(base,name)
+
+    def get_key(self, *parts):
+        # Builds a SHA-256 hex digest from the passed parts - bytes are
+        # hashed as-is, anything else is cast to a string first
+        h = hashlib.sha256()
+        for part in parts:
+            if not isinstance(part,bytes):
+                part = str(part).encode("utf-8")
+            # Prefix each part with its length so ("ab","c") != ("a","bc")
+            h.update(str(len(part)).encode("utf-8")+b":"+part)
+        return h.hexdigest()
+
+    def _get_path(self, key):
+        return os.path.join(self.cache_dir,key+self.ext)
+
+    def get(self, key):
+        # Returns the cached value for the passed key, or None if it's
+        # missing or unreadable
+        path = self._get_path(key)
+        if not os.path.isfile(path):
+            return None
+        try:
+            with open(path,"r") as f:
+                value = json.load(f)
+        except:
+            return None
+        # Update the modified time so we know it was used recently
+        try: os.utime(path,None)
+        except: pass
+        return value
+
+    def set(self, key, value):
+        # Saves the passed value - writing to a temp file first, then
+        # renaming it so we never leave a partial entry behind
+        if not os.path.isdir(self.cache_dir):
+            try: os.makedirs(self.cache_dir)
+            except: pass
+        path = self._get_path(key)
+        temp = path+".tmp"
+        try:
+            with open(temp,"w") as f:
+                json.dump(value,f)
+            if os.path.exists(path):
+                os.remove(path)
+            os.rename(temp,path)
+        except:
+            if os.path.exists(temp):
+                try: os.remove(temp)
+                except: pass
+            return False
+        return True
+
+    def _get_entries(self):
+        # Returns a list of (path, size, mtime) tuples for each entry
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        for x in os.listdir(self.cache_dir):
+            if not x.endswith(self.ext):
+                continue
+            path = os.path.join(self.cache_dir,x)
+            try:
+                stat = os.stat(path)
+            except:
+                continue
+            entries.append((path,stat.st_size,stat.st_mtime))
+        return entries
+
+    def get_stats(self):
+        # Returns a tuple of the entry count and total size in bytes
+        entries = self._get_entries()
+        return (len(entries),sum(x[1] for x in entries))
+
+    def prune(self):
+        # Removes the least recently used entries until we're under our
+        # max size - returns the number of entries removed
+        if not self.max_size or self.max_size <= 0:
+            return 0
+        entries = self._get_entries()
+        total = sum(x[1] for x in entries)
+        removed = 0
+        for path,size,mtime in sorted(entries,key=lambda x:x[2]):
+            if total <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+    def clear(self):
+        # Removes the cache folder entirely
+        if os.path.isdir(self.cache_dir):
+            shutil.rmtree(self.cache_dir,ignore_errors=True)
+        return not os.path.isdir(self.cache_dir)
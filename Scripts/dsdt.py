@@ -1,5 +1,10 @@
-import os, errno, tempfile, shutil, plistlib, sys, binascii, zipfile, getpass, re
-from . import run, downloader, utils
+import os, errno, tempfile, shutil, plistlib, sys, binascii, zipfile, getpass, re, multiprocessing, hashlib, array, bisect, heapq, json, time
+from multiprocessing.pool import ThreadPool
+from . import run, downloader, utils, cache, aml, listing, lazy
+try:
+    from shlex import quote
+except ImportError:
+    from pipes import quote
 
 try:
     FileNotFoundError
@@ -39,10 +44,46 @@ class DSDT:
             raise Exception(exception)
         self.allowed_signatures = (b"APIC",b"DMAR",b"DSDT",b"SSDT")
         self.mixed_listing      = (b"DSDT",b"SSDT")
+        # Verdicts from table_is_valid() keyed on path, mtime, size and the
+        # checks requested - so rescanning a folder only touches new files
+        self.valid_tables = {}
+        # Running totals for the files we've staged in temp folders - see
+        # stage_files()
+        self.staging_stats = {"linked":0,"symlinked":0,"copied":0,"bytes":0,"bytes_copied":0,"seconds":0.0}
+        self.ascii_bytes = bytes(bytearray(range(0x80)))
         self.acpi_tables = {}
+        # Loaded tables only build their lines, scopes, paths, and index
+        # the first time something asks for them
+        self.table_loaders = {
+            "lines":  self._load_lines,
+            "scopes": lambda table: self._load_parsed(table,"scopes"),
+            "paths":  lambda table: self._load_parsed(table,"paths"),
+            "index":  lambda table: self._load_parsed(table,"index")
+        }
+        # Merged namespace across all loaded DSDT/SSDT tables - see
+        # update_namespace()
+        self.namespace = {"tables":{},"rank":{},"by_suffix":{},"by_norm":{},"by_id":{},"scopes_by_norm":{}}
+        # Number of worker threads used to disassemble tables - 1 keeps things
+        # serial, and anything < 1 uses all available CPUs
+        self.jobs = kwargs.get("jobs",1)
+        # Set up our disassembly cache - keyed on the table bytes, iasl version
+        # and flags used.  Bump cache_format if the cached data changes shape.
+        self.use_cache = kwargs.get("use_cache",True)
+        self.cache = cache.Cache(
+            cache_dir=kwargs.get("cache_dir"),
+            max_size=kwargs.get("cache_size",256*1024*1024)
+        )
+        self.cache_format = 2
+        self.iasl_versions = {}
+        # Native AML decoder - lets us walk the namespace of DSDT/SSDT tables
+        # straight from their bytes.  With use_aml, path and id queries are
+        # answered from the decoded AML instead of the listing.
+        self.aml = aml.AML()
+        self.use_aml = kwargs.get("use_aml",False)
         # Setup regex matches
         self.hex_match  = re.compile(r"^\s*[0-9A-F]{4,}:(\s[0-9A-F]{2})+(\s+\/\/.*)?$")
         self.type_match = re.compile(r".*(?P<type>Processor|Scope|Device|Method|Name) \((?P<name>[^,\)]+).*")
+        self.id_match   = re.compile(r'"([^"]*)"')
 
     def _table_signature(self, table_path, table_name = None, data = None):
         path = os.path.join(table_path,table_name) if table_name else table_path
@@ -68,6 +109,9 @@ class DSDT:
         # It just appears to check if the passed byte is < 0x80
         # We'll check all available data though - and return the number
         # of non-ascii bytes
+        if isinstance(data,bytes):
+            # Strip every ascii byte in one go and count what's left
+            return len(data.translate(None,self.ascii_bytes))
         non_ascii = 0
         for b in data:
             if not isinstance(b,int):
@@ -77,37 +121,66 @@ class DSDT:
                 non_ascii += 1
         return non_ascii
 
-    def table_is_valid(self, table_path, table_name = None, ensure_binary = True, check_signature = True):
+    def table_is_valid(self, table_path, table_name = None, ensure_binary = True, check_signature = True, header_only = False):
         # Ensure we have a valid file
         path = os.path.join(table_path,table_name) if table_name else table_path
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
         if not os.path.isfile(path):
             return False
-        # Set up a data placeholder
-        data = None
-        if ensure_binary is not None:
-            # Make sure the table is the right type - load it
-            # and read the data
-            with open(path,"rb") as f:
+        # Check if we've already looked at this file as-is
+        key = (os.path.abspath(path),stat.st_mtime,stat.st_size,ensure_binary,check_signature,header_only)
+        if not key in self.valid_tables:
+            self.valid_tables[key] = self._table_is_valid(path,stat.st_size,ensure_binary,check_signature,header_only)
+        return self.valid_tables[key]
+
+    def _table_is_valid(self, path, size, ensure_binary = True, check_signature = True, header_only = False):
+        with open(path,"rb") as f:
+            if header_only:
+                # Only read the header up front - binary tables need a full
+                # header, with a declared length that fits in the file
+                data = f.read(36)
+                if ensure_binary and (len(data) < 36 or not 36 <= int(binascii.hexlify(data[7:3:-1]),16) <= size):
+                    return False
+            else:
                 data = f.read()
             # Make sure we actually got some data
-            if not data:
+            if not data and ensure_binary is not None:
                 return False
-            # Gather the non-ASCII char count
+            if check_signature:
+                if not self._table_signature(path,data=data) in self.allowed_signatures:
+                    return False
+            if ensure_binary is None:
+                # Don't care about the contents
+                return True
+            # Gather the non-ASCII char count - reading the rest in chunks
+            # until we find one if we only got the header
             non_ascii_count = self.non_ascii_count(data)
-            if ensure_binary and not non_ascii_count:
-                # We want a binary, but it's all ascii
-                return False
-            elif not ensure_binary and non_ascii_count:
-                # We want ascii, and got a binary
-                return False
-        if check_signature:
-            if not self._table_signature(path,data=data) in self.allowed_signatures:
-                # Check with the function - we didn't load the table
-                # already
-                return False
+            while header_only and not non_ascii_count:
+                data = f.read(65536)
+                if not data:
+                    break
+                non_ascii_count = self.non_ascii_count(data)
+        if ensure_binary and not non_ascii_count:
+            # We want a binary, but it's all ascii
+            return False
+        elif not ensure_binary and non_ascii_count:
+            # We want ascii, and got a binary
+            return False
         # If we got here - the table passed our checks
         return True
 
+    def data_is_valid(self, data, check_signature = True):
+        # The same checks table_is_valid() makes with header_only, against a
+        # table we already have in memory
+        if len(data) < 36 or not 36 <= int(binascii.hexlify(data[7:3:-1]),16) <= len(data):
+            return False
+        if check_signature and not data[:4] in self.allowed_signatures:
+            return False
+        return self.non_ascii_count(data) > 0
+
     def get_ascii_print(self, data):
         # Helper to sanitize unprintable characters by replacing them with
         # ? where needed
@@ -124,9 +197,567 @@ class DSDT:
                 unprintables = True
         return (unprintables,ascii_string)
 
-    def load(self, table_path):
+    def check_aml_patch(self, data, find, replace, index=None):
+        # Sanity checks a find/replace against the raw AML in memory so we
+        # only need iasl for patch sets that stand a chance.  Returns None if
+        # the patch looks safe to apply, or a string explaining why not.  If
+        # we already know find only occurs once, its index can be passed to
+        # skip searching for it again.  Patches that change the length can't
+        # be checked here - as any PkgLength encodings around the change
+        # would be off - so those are left to iasl.
+        # The table length is stored little-endian at offset 4 - if we have
+        # less than that, the table is truncated and no patch will help
+        if len(data) < 36 or int(binascii.hexlify(data[7:3:-1]),16) > len(data):
+            return "table is truncated"
+        if index is None and (not find or data.count(find) != 1):
+            return "find is not unique"
+        if index is None:
+            index = data.find(find)
+        if index < 36:
+            return "find overlaps the table header"
+        return None
+
+    def apply_aml_patches(self, data, patches):
+        # Returns a copy of data with each of the passed (index, find, replace)
+        # patches applied in order to a single buffer.  Each index is where
+        # find was in the buffer once the patches before it were applied - so
+        # this holds even if some of them changed the length.
+        data = bytearray(data)
+        for index,find,replace in patches:
+            data[index:index+len(find)] = replace
+        return bytes(data)
+
+    def find_in_patched(self, data, find, offsets, changed):
+        # Returns the sorted offsets of find in data, given the offsets it
+        # had before the (index, length) regions in changed were rewritten
+        # in place.  Matches away from those regions still stand, so we only
+        # need to search around each of them again.
+        if not find:
+            return []
+        touches = lambda o: any(o < i+l and i < o+len(find) for i,l in changed)
+        found = set(o for o in offsets if not touches(o))
+        for i,l in changed:
+            end = i+l+len(find)-1
+            o = data.find(find,max(0,i-len(find)+1),end)
+            while o != -1:
+                found.add(o)
+                o = data.find(find,o+1,end)
+        return sorted(found)
+
+    def get_jobs(self, jobs=None):
+        # Helper to resolve the number of worker threads to use when
+        # disassembling - None uses our default, and anything < 1 uses
+        # the number of available CPUs
+        if jobs is None: jobs = self.jobs
+        try: jobs = int(jobs)
+        except: jobs = 1
+        if jobs < 1:
+            try: jobs = multiprocessing.cpu_count()
+            except NotImplementedError: jobs = 1
+        return jobs
+
+    def _disassembled(self, folder_path, file_name):
+        # Helper to make sure the file exists and has a non-Zero size
+        check_path = os.path.join(folder_path,file_name)
+        if os.path.isfile(check_path) and os.stat(check_path).st_size > 0:
+            return True
+        return False
+
+    def _disassemble_serial(self, temp, target_files, dsdt_or_ssdt, other_tables):
+        # Disassembles the passed tables one iasl call at a time and returns
+        # a list of those that failed
+        failed = []
+        # Check our DSDT and SSDTs first
+        if dsdt_or_ssdt:
+            args = [self.iasl,"-da","-dl","-l"]+list(dsdt_or_ssdt)
+            out_d = self.r.run({"args":args})
+            if out_d[2] != 0:
+                # Attempt to run without `-da` if the above failed
+                args = [self.iasl,"-dl","-l"]+list(dsdt_or_ssdt)
+                out_d = self.r.run({"args":args})
+                for x in dsdt_or_ssdt:
+                    target_files[x]["fallback"] = True
+            # Get a list of disassembled names that failed
+            fail_temp = []
+            for x in dsdt_or_ssdt:
+                if not self._disassembled(temp,target_files[x]["disassembled_name"]):
+                    fail_temp.append(x)
+            # Let's try to disassemble any that failed individually
+            for x in fail_temp:
+                args = [self.iasl,"-dl","-l",x]
+                self.r.run({"args":args})
+                target_files[x]["fallback"] = True
+                if not self._disassembled(temp,target_files[x]["disassembled_name"]):
+                    failed.append(x)
+        # Check for other tables (DMAR, APIC, etc)
+        if other_tables:
+            args = [self.iasl]+list(other_tables)
+            out_t = self.r.run({"args":args})
+            # Get a list of disassembled names that failed
+            for x in other_tables:
+                if not self._disassembled(temp,target_files[x]["disassembled_name"]):
+                    failed.append(x)
+        return failed
+
+    def _disassemble_isolated(self, temp, file_name, args):
+        # Disassembles a single table in its own subfolder so it can run
+        # alongside other iasl calls in the same temp folder without
+        # clobbering their output - returns the subfolder used
+        iso = tempfile.mkdtemp(dir=temp)
+        self._stage_file(os.path.join(temp,file_name),iso)
+        self.r.run({"args":[self.iasl]+list(args)+[os.path.join(iso,file_name)]})
+        return iso
+
+    def _submit_isolated(self, pool, temp, file_name, mixed):
+        # Queues up a disassembly of the passed table in its own subfolder -
+        # DSDT/SSDTs get the flags the serial fallback would use
+        return pool.apply_async(
+            self._disassemble_isolated,
+            (temp,file_name,("-dl","-l") if mixed else ())
+        )
+
+    def _collect_isolated(self, temp, target_files, results, shared = (), use_fallback = True):
+        # Waits on the queued isolated disassemblies, and moves their output
+        # into temp - unless the table is in shared, and the shared `-da`
+        # pass already got it.  Returns a list of those that failed.
+        failed = []
+        for x,result in results:
+            iso = result.get()
+            name = target_files[x]["disassembled_name"]
+            if x in shared and not use_fallback and self._disassembled(temp,name):
+                continue # The shared pass got this one
+            if x in shared:
+                # Disassembled without `-da` - so it doesn't match the flags
+                # in its cache key
+                target_files[x]["fallback"] = True
+            if self._disassembled(iso,name):
+                shutil.move(os.path.join(iso,name),os.path.join(temp,name))
+            elif os.path.exists(os.path.join(temp,name)):
+                # Make sure we don't keep a partial result around
+                os.remove(os.path.join(temp,name))
+            if not self._disassembled(temp,name):
+                failed.append(x)
+        return failed
+
+    def _disassemble_parallel(self, temp, target_files, dsdt_or_ssdt, other_tables, jobs, pool = None, results = None):
+        # Disassembles the passed tables using a pool of worker threads - each
+        # worker just waits on its own iasl process, so this scales with the
+        # number of cores.  The shared `-da` pass over all DSDT/SSDTs runs
+        # alongside the per-table fallbacks, and we pick the results the same
+        # way the serial approach does.  Any isolated disassemblies already
+        # queued on the passed pool can be sent as a list of (name, result)
+        # in results.  Returns a list of those that failed.
+        own_pool = pool is None
+        if own_pool:
+            pool = ThreadPool(min(jobs,len(dsdt_or_ssdt)+len(other_tables)+1))
+        results = list(results or [])
+        try:
+            da_pass = None
+            if dsdt_or_ssdt:
+                da_pass = pool.apply_async(
+                    self.r.run,
+                    ({"args":[self.iasl,"-da","-dl","-l"]+list(dsdt_or_ssdt)},)
+                )
+            queued = set(x for x,result in results)
+            results.extend((x,self._submit_isolated(pool,temp,x,x in dsdt_or_ssdt)) for x in list(dsdt_or_ssdt)+list(other_tables) if not x in queued)
+            # Without `-da`, iasl disassembles each table on its own - so if the
+            # shared pass failed outright, the fallbacks are what a rerun without
+            # `-da` would have produced
+            use_fallback = da_pass is None or da_pass.get()[2] != 0
+            return self._collect_isolated(temp,target_files,results,shared=dsdt_or_ssdt,use_fallback=use_fallback)
+        finally:
+            if own_pool:
+                pool.close()
+                pool.join()
+
+    def _map_batches(self, iasl, batches, jobs):
+        # Runs each batch of .dsl files through iasl - spreading them across
+        # worker threads when we have more than one.  Returns a list of
+        # (batch, run output) tuples.
+        outputs = self.r.run_many([{"args":[iasl]+list(x)} for x in batches],jobs=jobs)
+        return list(zip(batches,outputs))
+
+    def compile_dsl(self, dsl_paths, iasl=None, jobs=None, batch_size=32):
+        # Compiles the passed .dsl files using as few iasl calls as we can,
+        # split over our worker threads.  Returns a dict of .dsl path ->
+        # (success, output), where output only holds the diagnostics for
+        # that file.
+        iasl = iasl or self.iasl
+        jobs = self.get_jobs(jobs)
+        # Drop any duplicates - keeping the first of each in order
+        unique,seen = [],set()
+        for x in dsl_paths:
+            if x in seen: continue
+            seen.add(x)
+            unique.append(x)
+        dsl_paths = unique
+        aml_paths = dict((x,os.path.splitext(x)[0]+".aml") for x in dsl_paths)
+        # Remove any stale .aml files so we only see what we compile now
+        for x in dsl_paths:
+            if os.path.exists(aml_paths[x]):
+                os.remove(aml_paths[x])
+        results = {}
+        retry = []
+        if len(dsl_paths) > 1:
+            # Keep each batch small enough to spread across our workers
+            batch_size = max(1,min(batch_size,-(-len(dsl_paths)//jobs)))
+            batches = [dsl_paths[i:i+batch_size] for i in range(0,len(dsl_paths),batch_size)]
+            for batch,out in self._map_batches(iasl,batches,jobs):
+                for x in batch:
+                    if out[2] == 0 and os.path.exists(aml_paths[x]):
+                        results[x] = (True,"")
+                    else:
+                        # We can't tell which file in a failed batch the
+                        # errors belong to - and iasl may have stopped before
+                        # getting to the rest, so retry them one by one
+                        retry.append(x)
+        else:
+            retry = dsl_paths
+        for batch,out in self._map_batches(iasl,[[x] for x in retry],jobs):
+            x = batch[0]
+            success = out[2] == 0 and os.path.exists(aml_paths[x])
+            results[x] = (success,"" if success else out[1] or out[0])
+        return results
+
+    def get_iasl_version(self, iasl=None):
+        # Returns the version reported by the passed iasl binary - falling back
+        # on the file's size and modified time if we can't get it
+        iasl = iasl or self.iasl
+        if not iasl in self.iasl_versions:
+            out = self.r.run({"args":[iasl,"-v"]})
+            version = re.search(r"version\s+(\S+)",out[0]+out[1])
+            if version:
+                self.iasl_versions[iasl] = version.group(1)
+            else:
+                try:
+                    stat = os.stat(iasl)
+                    self.iasl_versions[iasl] = "{}-{}".format(stat.st_size,int(stat.st_mtime))
+                except:
+                    self.iasl_versions[iasl] = "unknown"
+        return self.iasl_versions[iasl]
+
+    def _get_cache_keys(self, target_files, dsdt_or_ssdt, flags = "-da -dl -l"):
+        # Builds a cache key for each table from the SHA-256 of its raw bytes,
+        # the iasl version, and the flags used.  DSDT/SSDTs are disassembled
+        # together with -da, so the hashes of the others in the set are
+        # included too - whether that pass works depends on the whole set.
+        # Pass "-dl -l" as flags for the keys of DSDT/SSDTs that had to fall
+        # back on a run without -da.
+        version = self.get_iasl_version()
+        hashes = dict((x,hashlib.sha256(target_files[x]["raw"]).hexdigest()) for x in target_files)
+        context = self.cache.get_key(*sorted(hashes[x] for x in dsdt_or_ssdt))
+        keys = {}
+        for x in target_files:
+            if x in dsdt_or_ssdt:
+                keys[x] = self.cache.get_key(self.cache_format,hashes[x],version,flags,context)
+            else:
+                keys[x] = self.cache.get_key(self.cache_format,hashes[x],version,"","")
+        return keys
+
+    def _get_seen_key(self, raw):
+        # DSDT/SSDTs are cached alongside the rest of their set - this key
+        # just notes that we've disassembled the passed table before
+        return self.cache.get_key(self.cache_format,hashlib.sha256(raw).hexdigest(),self.get_iasl_version(),"seen")
+
+    def clear_cache(self):
+        # Removes all cached disassemblies
+        return self.cache.clear()
+
+    def format_hex_lines(self, data, address=0, indent="   "):
+        # Returns a list of mixed listing style hex lines for the passed
+        # bytes - 16 per line, starting at the passed address.  The whole
+        # run is hexlified at once, then sliced up per line.
+        hex_string = binascii.hexlify(data)
+        # Decode the bytes if we're on python 3
+        if 2/3!=0: hex_string = hex_string.decode()
+        # Ensure the bytes are all upper case
+        hex_string = hex_string.upper()
+        lines = []
+        for i in range(0,len(hex_string),32):
+            chunk = hex_string[i:i+32]
+            lines.append("{}{:04X}: {}".format(
+                indent,
+                address+i//2,
+                " ".join([chunk[j:j+2] for j in range(0,len(chunk),2)])
+            ))
+        return lines
+
+    def _reconstruct_hex_lines(self, lines, raw):
+        # The disassembler omits the last line of hex data in a mixed listing
+        # file... convenient.  However - we should be able to reconstruct this
+        # manually.
+        last_hex = next((lines[i] for i in range(len(lines)-1,-1,-1) if self.is_hex(lines[i])),None)
+        next_addr = start = 0
+        if last_hex:
+            # Get the address left of the colon
+            addr = int(last_hex.split(":")[0].strip(),16)
+            # Get the hex bytes right of the colon
+            hexs = last_hex.split(":")[1].split("//")[0].strip()
+            # Increment the address by the number of hex bytes
+            start = next_addr = addr+len(hexs.split())
+            # The addresses are offsets into the table - but make sure the
+            # bytes are where we expect, and fall back on the last occurrence
+            # if not.  Either way the synthetic lines are numbered from the
+            # same offset we slice the bytes from.
+            hexb = self.get_hex_bytes(hexs.replace(" ",""))
+            if raw[addr:next_addr] != hexb:
+                found = raw.rfind(hexb)
+                start = next_addr = found+len(hexb) if found > -1 else len(raw)
+        # If we didn't get a last hex val - then we likely don't have any
+        # This can happen if the file passed is small enough, or has all
+        # the data in a single block.
+        lines.extend(self.format_hex_lines(memoryview(raw)[start:],address=next_addr))
+
+    def iter_lines(self, text):
+        # Yields the lines of the passed text the same as text.split("\n")
+        # would - without building the list
+        start = 0
+        while True:
+            end = text.find("\n",start)
+            if end == -1:
+                yield text[start:]
+                return
+            yield text[start:end]
+            start = end+1
+
+    def _iter_file_lines(self, f):
+        # Yields the lines of an open file without their newlines - the same
+        # as f.read().split("\n") would
+        line = None
+        for line in f:
+            if not line.endswith("\n"):
+                yield line
+                return
+            yield line[:-1]
+        yield ""
+
+    def read_dsl(self, path):
+        # Yields the lines of a disassembled table one at a time - leaving
+        # off the compiler banner at the start, and everything from the last
+        # "Table Header:" (or failing that, "Raw Table Data: Length") line at
+        # the end, as we go.  Either strips the whitespace around what's left.
+        footers = ("Table Header:","Raw Table Data: Length")
+        with open(path,"r") as f:
+            lines = self._iter_file_lines(f)
+            first = next(lines)
+            strip = first.startswith("/*")
+            if strip:
+                # Skip everything through the first */ - and any whitespace
+                # that follows it
+                line = first
+                while not "*/" in line:
+                    line = next(lines,None)
+                    if line is None:
+                        yield ""
+                        return
+                first = line.split("*/",1)[1].lstrip()
+                while not first:
+                    first = next(lines,None)
+                    if first is None:
+                        yield ""
+                        return
+                    first = first.lstrip()
+            # Lines from the last footer we've seen are held back until we
+            # know whether a later footer replaces it.  The last non-blank
+            # line and any blank lines after it are held back as well, in
+            # case we need to strip them.
+            footer = None
+            tail   = []
+            last   = None
+            blanks = []
+            for i,line in enumerate(self._chain_lines(first,lines)):
+                kind = next((x for x in footers if line.startswith(x)),None) if i else None
+                if kind and (footer is None or kind == footer or kind == footers[0]):
+                    # A new cut point - keep anything held since the last
+                    footer = kind
+                    pending,tail = tail,[line]
+                elif footer is not None:
+                    tail.append(line)
+                    continue
+                else:
+                    pending = [line]
+                for l in pending:
+                    if not l.strip():
+                        blanks.append(l)
+                        continue
+                    if last is not None:
+                        yield last
+                    for b in blanks:
+                        yield b
+                    last,blanks = l,[]
+            if strip or footer is not None:
+                yield last.rstrip() if last is not None else ""
+                return
+            if last is not None:
+                yield last
+            for b in blanks:
+                yield b
+
+    def _chain_lines(self, first, lines):
+        yield first
+        for line in lines:
+            yield line
+
+    def _load_lines(self, table):
+        # Builds the listing from the disassembly we kept at load - hex lines
+        # in mixed listings are kept as offsets into the raw table
+        raw = table["raw"] if table["raw"][:4] in self.mixed_listing else None
+        lines = listing.Listing(self.iter_lines(table.pop("text","")),raw=raw)
+        if raw is not None:
+            self._reconstruct_hex_lines(lines,raw)
+        return lines
+
+    def _load_parsed(self, table, key):
+        # Walks the lines once to get the scopes, paths, and our index
+        parsed = self.parse_table(table=table)
+        values = {
+            "scopes": parsed["scopes"],
+            "paths":  parsed["paths"],
+            "index":  self.build_index(parsed,raw=table.get("raw"),lines=table["lines"])
+        }
+        # Save them all while we have them
+        for k in values:
+            table[k] = values[k]
+        return values[key]
+
+    def get_load_stats(self):
+        # Returns a dict of {key:{"hits":x,"misses":y}} for the lazily built
+        # data across all loaded tables - along with a copy of our running
+        # staging_stats under "staging"
+        stats = {}
+        for table in self.acpi_tables.values():
+            for key in getattr(table,"loaders",{}):
+                s = stats.setdefault(key,{"hits":0,"misses":0})
+                s["hits"]   += table.hits.get(key,0)
+                s["misses"] += table.misses.get(key,0)
+        stats["staging"] = dict(self.staging_stats)
+        return stats
+
+    def _stage_file(self, source, folder):
+        # Makes the passed file available in folder under the same name -
+        # hardlinking it if we can, then symlinking, and only copying if
+        # neither works.  Returns how it was staged.  Linked files share the
+        # original's bytes, so they must never be written to in place.
+        target = os.path.join(folder,os.path.basename(source))
+        for method,func in (("linked",getattr(os,"link",None)),("symlinked",getattr(os,"symlink",None))):
+            if not func:
+                continue
+            try:
+                func(os.path.abspath(source),target)
+                return method
+            except (OSError, NotImplementedError):
+                pass # Not supported here, or across these filesystems
+        shutil.copy(source,target)
+        return "copied"
+
+    def stage_files(self, sources, folder):
+        # Stages each of the passed files in folder, and adds the counts,
+        # bytes, and time taken to our staging_stats
+        start = time.time()
+        for source in sources:
+            method = self._stage_file(source,folder)
+            size = os.path.getsize(source)
+            self.staging_stats[method] += 1
+            self.staging_stats["bytes"] += size
+            if method == "copied":
+                self.staging_stats["bytes_copied"] += size
+        self.staging_stats["seconds"] += time.time()-start
+
+    def _new_table(self, file_name):
+        # Returns the lazily loaded table for the passed file name
+        return lazy.LazyTable(self.table_loaders,{
+            "assembled_name": os.path.basename(file_name),
+            "disassembled_name": ".".join(file_name.split(".")[:-1]) + ".dsl",
+        })
+
+    def _get_fallback_keys(self, target_files, dsdt_or_ssdt):
+        # Returns the cache keys for DSDT/SSDTs disassembled without -da
+        if not self.use_cache:
+            return {}
+        keys = self._get_cache_keys(target_files,dsdt_or_ssdt,flags="-dl -l")
+        return dict((x,keys[x]) for x in dsdt_or_ssdt)
+
+    def _get_cached_tables(self, cache_keys, fallback_keys = None):
+        # Returns a dict of file name -> cached disassembly for each of the
+        # passed cache keys we have a cached result for - checking the
+        # fallback key for any file that misses
+        cached_tables = {}
+        for file,key in cache_keys.items():
+            for k in (key,(fallback_keys or {}).get(file)):
+                cached = self.cache.get(k) if k else None
+                if isinstance(cached,dict) and "table" in cached:
+                    cached_tables[file] = cached
+                    break
+        return cached_tables
+
+    def _finish_load(self, temp, target_files, cache_keys, cached_tables, failed, fallback_keys = None):
+        # Reads the disassembly and header info for each table once iasl is
+        # done with them - caching any new results.  Tables that failed are
+        # removed from target_files.
+        if len(failed) == len(target_files):
+            raise Exception("Failed to disassemble - {}".format(", ".join(failed)))
+        # Actually process the tables now
+        to_remove = []
+        for file in target_files:
+            # We need to load the .dsl into memory - the lines, scopes,
+            # and paths are only worked out from it when first needed
+            cached = cached_tables.get(file)
+            if cached:
+                # Restore the disassembly from our cache
+                target_files[file]["text"] = cached["table"]
+            elif not self._disassembled(temp,target_files[file]["disassembled_name"]):
+                to_remove.append(file)
+                continue
+            else:
+                # Read the disassembly line by line - leaving off the
+                # compiler info at the start, and the table header/raw
+                # data at the end
+                target_files[file]["text"] = "\n".join(self.read_dsl(os.path.join(temp,target_files[file]["disassembled_name"])))
+            table_bytes = target_files[file]["raw"]
+            # Let's read the table header and get the info we need
+            #
+            # [0:4]   = Table Signature
+            # [4:8]   = Length (little endian)
+            # [8]     = Compliance Revision
+            # [9]     = Checksum
+            # [10:16] = OEM ID (6 chars, padded to the right with \x00)
+            # [16:24] = Table ID (8 chars, padded to the right with \x00)
+            # [24:28] = OEM Revision (little endian)
+            # 
+            target_files[file]["signature"] = table_bytes[0:4]
+            target_files[file]["revision"]  = table_bytes[8]
+            target_files[file]["oem"]       = table_bytes[10:16]
+            target_files[file]["id"]        = table_bytes[16:24]
+            target_files[file]["oem_revision"] = int(binascii.hexlify(table_bytes[24:28][::-1]),16)
+            target_files[file]["length"]    = len(table_bytes)
+            # Get the printable versions of the sig, oem, and id as needed
+            for key in ("signature","oem","id"):
+                unprintable,ascii_string = self.get_ascii_print(target_files[file][key])
+                if unprintable:
+                    target_files[file][key+"_ascii"] = ascii_string
+            # Cast as int on py2, and try to decode bytes to strings on py3
+            if 2/3==0:
+                target_files[file]["revision"] = int(binascii.hexlify(target_files[file]["revision"]),16)
+            # Save the results so we can skip this next time - under the key
+            # for the flags that actually produced them
+            key = (fallback_keys or {}).get(file) if target_files[file].get("fallback") else cache_keys.get(file)
+            if not cached and key:
+                self.cache.set(key,{
+                    "table":  target_files[file]["text"]
+                })
+                if table_bytes[:4] in self.mixed_listing:
+                    self.cache.set(self._get_seen_key(table_bytes),{"seen":True})
+        if cache_keys:
+            # Keep the cache under its size cap
+            self.cache.prune()
+        # Remove any that didn't disassemble
+        for file in to_remove:
+            target_files.pop(file,None)
+
+    def load(self, table_path, jobs=None):
         # Attempt to load the passed file - or if a directory
-        # was passed, load all .aml and .dat files within
+        # was passed, load all .aml and .dat files within - jobs
+        # can be passed to disassemble with multiple worker threads
         cwd = os.getcwd()
         temp = None
         target_files = {}
@@ -136,12 +767,12 @@ class DSDT:
                 # Got a directory - gather all valid
                 # files in the directory
                 valid_files = [
-                    x for x in os.listdir(table_path) if self.table_is_valid(table_path,x)
+                    x for x in os.listdir(table_path) if self.table_is_valid(table_path,x,header_only=True)
                 ]
             elif os.path.isfile(table_path):
                 # Just loading the one table - don't check
                 # the signature - but make sure it's binary
-                if self.table_is_valid(table_path,check_signature=False):
+                if self.table_is_valid(table_path,check_signature=False,header_only=True):
                     valid_files = [table_path]
                 else:
                     # Not valid - raise an error
@@ -164,26 +795,17 @@ class DSDT:
                     os.strerror(errno.ENOENT),
                     "No valid .aml/.dat files found at {}".format(table_path)
                 )
-            # Create a temp dir and copy all files there
+            # Create a temp dir and stage all files there
             temp = tempfile.mkdtemp()
-            for file in valid_files:
-                shutil.copy(
-                    os.path.join(table_path,file),
-                    temp
-                )
+            self.stage_files([os.path.join(table_path,file) for file in valid_files],temp)
             # Build a list of all target files in the temp folder - and save
             # the disassembled_name for each to verify after
-            list_dir = os.listdir(temp)
-            for x in list_dir:
-                if len(list_dir) > 1 and not self.table_is_valid(temp,x):
-                    continue # Skip invalid files when multiple are passed
+            # Everything in temp was validated before we copied it over
+            for x in os.listdir(temp):
                 name_ext = [y for y in os.path.basename(x).split(".") if y]
                 if name_ext and name_ext[-1].lower() in ("asl","dsl"):
                     continue # Skip any already disassembled files
-                target_files[x] = {
-                    "assembled_name": os.path.basename(x),
-                    "disassembled_name": ".".join(x.split(".")[:-1]) + ".dsl",
-                }
+                target_files[x] = self._new_table(x)
             if not target_files:
                 # Somehow we ended up with none?
                 raise FileNotFoundError(
@@ -192,143 +814,109 @@ class DSDT:
                     "No valid .aml/.dat files found at {}".format(table_path)
                 )
             os.chdir(temp)
+            # Load the raw bytes of each table so we can check the cache
+            for file in target_files:
+                with open(os.path.join(temp,file),"rb") as f:
+                    target_files[file]["raw"] = f.read()
             # Generate and run a command
-            dsdt_or_ssdt = [x for x in list(target_files) if self._table_signature(temp,x) in self.mixed_listing]
+            dsdt_or_ssdt = [x for x in list(target_files) if target_files[x]["raw"][:4] in self.mixed_listing]
             other_tables = [x for x in list(target_files) if not x in dsdt_or_ssdt]
-            out_d = ("","",0)
-            out_t = ("","",0)
-
-            def exists(folder_path,file_name):
-                # Helper to make sure the file exists and has a non-Zero size
-                check_path = os.path.join(folder_path,file_name)
-                if os.path.isfile(check_path) and os.stat(check_path).st_size > 0:
-                    return True
-                return False
-            
-            # Check our DSDT and SSDTs first
-            if dsdt_or_ssdt:
-                args = [self.iasl,"-da","-dl","-l"]+list(dsdt_or_ssdt)
-                out_d = self.r.run({"args":args})
-                if out_d[2] != 0:
-                    # Attempt to run without `-da` if the above failed
-                    args = [self.iasl,"-dl","-l"]+list(dsdt_or_ssdt)
-                    out_d = self.r.run({"args":args})
-                # Get a list of disassembled names that failed
-                fail_temp = []
-                for x in dsdt_or_ssdt:
-                    if not exists(temp,target_files[x]["disassembled_name"]):
-                        fail_temp.append(x)
-                # Let's try to disassemble any that failed individually
-                for x in fail_temp:
-                    args = [self.iasl,"-dl","-l",x]
-                    self.r.run({"args":args})
-                    if not exists(temp,target_files[x]["disassembled_name"]):
-                        failed.append(x)
-            # Check for other tables (DMAR, APIC, etc)
-            if other_tables:
-                args = [self.iasl]+list(other_tables)
-                out_t = self.r.run({"args":args})
-                # Get a list of disassembled names that failed
-                for x in other_tables:
-                    if not exists(temp,target_files[x]["disassembled_name"]):
-                        failed.append(x)
-            if len(failed) == len(target_files):
-                raise Exception("Failed to disassemble - {}".format(", ".join(failed)))
-            # Actually process the tables now
-            to_remove = []
-            for file in target_files:
-                # We need to load the .aml and .dsl into memory
-                # and get the paths and scopes
-                if not exists(temp,target_files[file]["disassembled_name"]):
-                    to_remove.append(file)
+            cache_keys = self._get_cache_keys(target_files,dsdt_or_ssdt) if self.use_cache else {}
+            fallback_keys = self._get_fallback_keys(target_files,dsdt_or_ssdt)
+            cached_tables = self._get_cached_tables(cache_keys,fallback_keys)
+            # The -da pass resolves externals across all DSDT/SSDTs at once, so we can
+            # only skip it if every one of them was cached
+            if all(x in cached_tables for x in dsdt_or_ssdt):
+                dsdt_or_ssdt = []
+            other_tables = [x for x in other_tables if not x in cached_tables]
+            jobs = self.get_jobs(jobs)
+            if jobs > 1 and len(dsdt_or_ssdt)+len(other_tables) > 1:
+                failed.extend(self._disassemble_parallel(temp,target_files,dsdt_or_ssdt,other_tables,jobs))
+            elif dsdt_or_ssdt or other_tables:
+                failed.extend(self._disassemble_serial(temp,target_files,dsdt_or_ssdt,other_tables))
+            self._finish_load(temp,target_files,cache_keys,cached_tables,failed,fallback_keys)
+        except Exception as e:
+            print(e)
+            return ({},failed)
+        finally:
+            os.chdir(cwd)
+            if temp: shutil.rmtree(temp,ignore_errors=True)
+        # Add/update any tables we loaded
+        for table in target_files:
+            self.acpi_tables[table] = target_files[table]
+        # Only return the newly loaded results
+        return (target_files, failed,)
+
+    def load_stream(self, tables, jobs=None):
+        # Loads tables from an iterable of (file name, raw bytes) - like the
+        # one iter_dump_linux_tables() returns - starting on each one as soon
+        # as it comes in instead of waiting on the full set.  Tables are only
+        # checked in memory, and written straight to our temp folder.  Those
+        # that aren't DSDT/SSDTs are disassembled as they arrive - as are the
+        # per-table fallbacks for DSDT/SSDTs with more than one job - while
+        # the shared `-da` pass waits until we have them all.  Returns the
+        # same as load().
+        cwd = os.getcwd()
+        temp = None
+        pool = None
+        target_files = {}
+        failed = []
+        try:
+            temp = tempfile.mkdtemp()
+            os.chdir(temp)
+            jobs = self.get_jobs(jobs)
+            pool = ThreadPool(jobs)
+            results = []
+            cached_tables = {}
+            for file,raw in tables:
+                if not self.data_is_valid(raw):
                     continue
-                with open(os.path.join(temp,target_files[file]["disassembled_name"]),"r") as f:
-                    target_files[file]["table"] = f.read()
-                    # Remove the compiler info at the start
-                    if target_files[file]["table"].startswith("/*"):
-                        target_files[file]["table"] = "*/".join(target_files[file]["table"].split("*/")[1:]).strip()
-                    # Check for "Table Header:" or "Raw Table Data: Length" and strip everything
-                    # after the last occurrence
-                    for h in ("\nTable Header:","\nRaw Table Data: Length"):
-                        if h in target_files[file]["table"]:
-                            target_files[file]["table"] = h.join(target_files[file]["table"].split(h)[:-1]).rstrip()
-                            break # Bail on the first match
-                    target_files[file]["lines"] = target_files[file]["table"].split("\n")
-                    target_files[file]["scopes"] = self.get_scopes(table=target_files[file])
-                    target_files[file]["paths"] = self.get_paths(table=target_files[file])
-                with open(os.path.join(temp,file),"rb") as f:
-                    table_bytes = f.read()
-                    target_files[file]["raw"] = table_bytes
-                    # Let's read the table header and get the info we need
-                    #
-                    # [0:4]   = Table Signature
-                    # [4:8]   = Length (little endian)
-                    # [8]     = Compliance Revision
-                    # [9]     = Checksum
-                    # [10:16] = OEM ID (6 chars, padded to the right with \x00)
-                    # [16:24] = Table ID (8 chars, padded to the right with \x00)
-                    # [24:28] = OEM Revision (little endian)
-                    # 
-                    target_files[file]["signature"] = table_bytes[0:4]
-                    target_files[file]["revision"]  = table_bytes[8]
-                    target_files[file]["oem"]       = table_bytes[10:16]
-                    target_files[file]["id"]        = table_bytes[16:24]
-                    target_files[file]["oem_revision"] = int(binascii.hexlify(table_bytes[24:28][::-1]),16)
-                    target_files[file]["length"]    = len(table_bytes)
-                    # Get the printable versions of the sig, oem, and id as needed
-                    for key in ("signature","oem","id"):
-                        unprintable,ascii_string = self.get_ascii_print(target_files[file][key])
-                        if unprintable:
-                            target_files[file][key+"_ascii"] = ascii_string
-                    # Cast as int on py2, and try to decode bytes to strings on py3
-                    if 2/3==0:
-                        target_files[file]["revision"] = int(binascii.hexlify(target_files[file]["revision"]),16)
-                if target_files[file]["signature"] in self.mixed_listing:
-                    # The disassembler omits the last line of hex data in a mixed listing
-                    # file... convenient.  However - we should be able to reconstruct this
-                    # manually.
-                    last_hex = next((l for l in target_files[file]["lines"][::-1] if self.is_hex(l)),None)
-                    if last_hex:
-                        # Get the address left of the colon
-                        addr = int(last_hex.split(":")[0].strip(),16)
-                        # Get the hex bytes right of the colon
-                        hexs = last_hex.split(":")[1].split("//")[0].strip()
-                        # Increment the address by the number of hex bytes
-                        next_addr = addr+len(hexs.split())
-                        # Now we need to get the bytes at the end
-                        hexb = self.get_hex_bytes(hexs.replace(" ",""))
-                        # Get the last occurrence after the split
-                        remaining = target_files[file]["raw"].split(hexb)[-1]
-                    else:
-                        # If we didn't get a last hex val - then we likely don't have any
-                        # This can happen if the file passed is small enough, or has all
-                        # the data in a single block.
-                        next_addr = 0
-                        remaining = target_files[file]["raw"]
-                    # Iterate in chunks of 16
-                    for chunk in [remaining[i:i+16] for i in range(0,len(remaining),16)]:
-                        # Build a new byte string
-                        hex_string = binascii.hexlify(chunk)
-                        # Decode the bytes if we're on python 3
-                        if 2/3!=0: hex_string = hex_string.decode()
-                        # Ensure the bytes are all upper case
-                        hex_string = hex_string.upper()
-                        l = "   {}: {}".format(
-                            hex(next_addr)[2:].upper().rjust(4,"0"),
-                            " ".join([hex_string[i:i+2] for i in range(0,len(hex_string),2)])
-                        )
-                        # Increment our address
-                        next_addr += len(chunk)
-                        # Append our line
-                        target_files[file]["lines"].append(l)
-                        target_files[file]["table"] += "\n"+l
-            # Remove any that didn't disassemble
-            for file in to_remove:
-                target_files.pop(file,None)
+                with open(os.path.join(temp,file),"wb") as f:
+                    f.write(raw)
+                target_files[file] = self._new_table(file)
+                target_files[file]["raw"] = raw
+                if raw[:4] in self.mixed_listing:
+                    # Start the fallback now - unless we've seen this table
+                    # before, and the cache may let us skip iasl entirely
+                    if jobs > 1 and not (self.use_cache and self.cache.get(self._get_seen_key(raw))):
+                        results.append((file,self._submit_isolated(pool,temp,file,True)))
+                    continue
+                # Other tables are cached on their own bytes, so we know if we
+                # need them right away
+                if self.use_cache:
+                    cached_tables.update(self._get_cached_tables(self._get_cache_keys({file:target_files[file]},[])))
+                if not file in cached_tables:
+                    results.append((file,self._submit_isolated(pool,temp,file,False)))
+            if not target_files:
+                raise FileNotFoundError(
+                    errno.ENOENT,
+                    os.strerror(errno.ENOENT),
+                    "No valid tables were found"
+                )
+            dsdt_or_ssdt = [x for x in list(target_files) if target_files[x]["raw"][:4] in self.mixed_listing]
+            other_tables = [x for x in list(target_files) if not x in dsdt_or_ssdt and not x in cached_tables]
+            cache_keys = self._get_cache_keys(target_files,dsdt_or_ssdt) if self.use_cache else {}
+            fallback_keys = self._get_fallback_keys(target_files,dsdt_or_ssdt)
+            cached_tables.update(self._get_cached_tables(dict((x,cache_keys[x]) for x in dsdt_or_ssdt if x in cache_keys),fallback_keys))
+            # The -da pass resolves externals across all DSDT/SSDTs at once, so we can
+            # only skip it if every one of them was cached
+            if all(x in cached_tables for x in dsdt_or_ssdt):
+                dsdt_or_ssdt = []
+                results = [x for x in results if x[0] in other_tables]
+            if jobs > 1:
+                failed.extend(self._disassemble_parallel(temp,target_files,dsdt_or_ssdt,other_tables,jobs,pool=pool,results=results))
+            else:
+                failed.extend(self._collect_isolated(temp,target_files,results))
+                if dsdt_or_ssdt:
+                    failed.extend(self._disassemble_serial(temp,target_files,dsdt_or_ssdt,[]))
+            self._finish_load(temp,target_files,cache_keys,cached_tables,failed,fallback_keys)
         except Exception as e:
             print(e)
             return ({},failed)
         finally:
+            if pool:
+                pool.close()
+                pool.join()
             os.chdir(cwd)
             if temp: shutil.rmtree(temp,ignore_errors=True)
         # Add/update any tables we loaded
@@ -470,9 +1058,11 @@ class DSDT:
                     print("   - Copying to {} directory".format(os.path.basename(script_dir)))
                     shutil.copy(os.path.join(search_dir,x), os.path.join(script_dir,x))
 
-    def dump_tables(self, output, disassemble=False):
+    def dump_tables(self, output, disassemble=False, table_dir="/sys/firmware/acpi/tables", include_dynamic=False, include_data=False, jobs=None):
         # Helper to dump all ACPI tables to the specified
-        # output path
+        # output path - table_dir, include_dynamic and include_data only
+        # apply on Linux.  With disassemble, the tables are
+        # loaded too, and we return the same as load()
         def check_command_output(out):
             if out[2] == 0: return False
             print(" - {}".format(out[1]))
@@ -516,40 +1106,129 @@ class DSDT:
                             print(" - {} -> {} failed: {}".format(f,new_name,e))
                 print("Dump successful!")
                 if disassemble:
-                    return self.load(res)
+                    return self.load(res,jobs=jobs)
                 return res
             else:
                 print("Failed to locate acpidump.exe")
                 return
         elif sys.platform.startswith("linux"):
-            table_dir = "/sys/firmware/acpi/tables"
             if not os.path.isdir(table_dir):
                 print("Could not locate {}!".format(table_dir))
                 return
             print("Copying tables to {}...".format(res))
-            copied_files = []
-            for table in os.listdir(table_dir):
-                if not os.path.isfile(os.path.join(table_dir,table)):
-                    continue # We only want files
-                target_path = os.path.join(res,table.upper()+".aml")
-                comms = (
-                    # Copy the file
-                    ["sudo","cp",os.path.join(table_dir,table),target_path],
-                    # Ensure it's owned by the user account
-                    ["sudo","chown",getpass.getuser(),target_path],
-                    # Enable read and write permissions
-                    ["sudo","chmod","a+rw",target_path]
-                )
-                # Iterate our commands and bail if any error
-                for comm in comms:
-                    out = self.r.run({"args":comm})
-                    if check_command_output(out):
-                        return
-            print("Dump successful!")
             if disassemble:
-                return self.load(res)
+                # Disassemble each table as soon as it's been dumped
+                manifest = {"source":table_dir,"tables":[]}
+                tables = self.get_linux_tables(table_dir,include_dynamic=include_dynamic,include_data=include_data)
+                def dump():
+                    # load_stream() prints whatever stops the stream - so give
+                    # a failed dump the same " - " prefix it'd get otherwise
+                    try:
+                        for table in self.iter_dump_linux_tables(res,table_dir=table_dir,include_dynamic=include_dynamic,include_data=include_data,manifest=manifest):
+                            yield table
+                    except Exception as e:
+                        raise Exception(" - {}".format(e))
+                loaded = self.load_stream(dump(),jobs=jobs)
+                if len(manifest["tables"]) < len(tables):
+                    return # Not everything got dumped
+                self.write_manifest(res,manifest)
+                print("Dump successful!")
+                return loaded
+            manifest = self.dump_linux_tables(res,table_dir=table_dir,include_dynamic=include_dynamic,include_data=include_data)
+            if manifest is None:
+                return
+            print("Dump successful!")
             return res
 
+    def get_linux_tables(self, table_dir = "/sys/firmware/acpi/tables", include_dynamic = False, include_data = False):
+        # Returns a list of (source path, dumped name) tuples for the tables
+        # in table_dir - optionally with the SSDTs the firmware loaded at
+        # runtime in its dynamic subfolder, and the raw data regions (BERT
+        # and the like) in its data subfolder.  Those are prefixed so they
+        # don't collide with the tables of the same name - and the data ones
+        # aren't tables, so they're saved as .bin instead of .aml.
+        tables = []
+        folders = [(table_dir,"",".aml")]
+        if include_dynamic:
+            folders.append((os.path.join(table_dir,"dynamic"),"DYNAMIC-",".aml"))
+        if include_data:
+            folders.append((os.path.join(table_dir,"data"),"DATA-",".bin"))
+        for folder,prefix,ext in folders:
+            if not os.path.isdir(folder):
+                continue
+            for table in sorted(os.listdir(folder)):
+                if not os.path.isfile(os.path.join(folder,table)):
+                    continue # We only want files
+                tables.append((os.path.join(folder,table),prefix+table.upper()+ext))
+        return tables
+
+    def iter_dump_linux_tables(self, output, table_dir = "/sys/firmware/acpi/tables", include_dynamic = False, include_data = False, manifest = None):
+        # Copies the tables from table_dir to the output folder - reading them
+        # directly where we can, and copying any we can't in a single sudo
+        # call that also fixes their ownership and permissions.  Yields the
+        # (dumped name, raw bytes) of each table once it's written.  If a
+        # manifest dict is passed, the source, size, and SHA-256 of each are
+        # added to its "tables" list.  Raises an Exception if the sudo call
+        # fails.
+        tables = self.get_linux_tables(table_dir,include_dynamic=include_dynamic,include_data=include_data)
+        privileged = []
+        def dumped(source, name, data):
+            if manifest is not None:
+                manifest.setdefault("tables",[]).append({
+                    "name":name,
+                    "source":source,
+                    "size":len(data),
+                    "sha256":hashlib.sha256(data).hexdigest()
+                })
+            return (name,data)
+        for source,name in tables:
+            try:
+                with open(source,"rb") as f:
+                    data = f.read()
+            except (IOError, OSError):
+                privileged.append((source,name))
+                continue
+            with open(os.path.join(output,name),"wb") as f:
+                f.write(data)
+            yield dumped(source,name,data)
+        if privileged:
+            targets = [quote(os.path.join(output,n)) for s,n in privileged]
+            script = " && ".join(
+                # Copy the files
+                ["cp {} {}".format(quote(s),t) for (s,n),t in zip(privileged,targets)]+[
+                # Ensure they're owned by the user account
+                "chown {} {}".format(quote(getpass.getuser())," ".join(targets)),
+                # Enable read and write permissions
+                "chmod a+rw {}".format(" ".join(targets))
+            ])
+            out = self.r.run({"args":["sudo","sh","-c",script]})
+            if out[2] != 0:
+                raise Exception(out[1])
+            for source,name in privileged:
+                with open(os.path.join(output,name),"rb") as f:
+                    data = f.read()
+                yield dumped(source,name,data)
+
+    def write_manifest(self, output, manifest, manifest_name = "manifest.json"):
+        # Saves the passed dump manifest to the output folder
+        with open(os.path.join(output,manifest_name),"w") as f:
+            json.dump(manifest,f,indent=2)
+
+    def dump_linux_tables(self, output, table_dir = "/sys/firmware/acpi/tables", include_dynamic = False, include_data = False, manifest_name = "manifest.json"):
+        # Dumps the tables in table_dir to the output folder, and writes a
+        # manifest listing the source, size, and SHA-256 of each dumped table.
+        # Returns the manifest - or None if something failed.
+        manifest = {"source":table_dir,"tables":[]}
+        try:
+            for table in self.iter_dump_linux_tables(output,table_dir=table_dir,include_dynamic=include_dynamic,include_data=include_data,manifest=manifest):
+                pass
+        except Exception as e:
+            print(" - {}".format(e))
+            return None
+        if manifest_name:
+            self.write_manifest(output,manifest,manifest_name=manifest_name)
+        return manifest
+
     def check_output(self, output):
         t_folder = os.path.join(os.path.dirname(os.path.dirname(os.path.realpath(__file__))), output)
         if not os.path.isdir(t_folder):
@@ -574,6 +1253,21 @@ class DSDT:
     def get_hex_bytes(self, line):
         return binascii.unhexlify(line)
 
+    def get_hex_text(self, data):
+        # Returns the passed bytes as an upper case hex string
+        hex_text = binascii.hexlify(data)
+        if 2/3!=0: hex_text = hex_text.decode()
+        return hex_text.upper()
+
+    def table_contains(self, value, table=None):
+        if not table: table = self.get_dsdt_or_only()
+        if not table: return False
+        # Checks if the passed value is anywhere in the table's listing
+        lines = table.get("lines",[])
+        if isinstance(lines,listing.Listing):
+            return lines.contains(value)
+        return value in "\n".join(lines)
+
     def get_str_bytes(self, value):
         if 2/3!=0 and isinstance(value,str):
             value = value.encode()
@@ -608,6 +1302,19 @@ class DSDT:
         # Returns the index of the previous set of hex digits before the passed index
         start_index = -1
         end_index   = -1
+        hex_map = self.get_hex_map(table=table)
+        if hex_map and 0 <= index < len(hex_map["offset"]):
+            # Skip the hex run we're in, and the line that broke it
+            i = index
+            if hex_map["offset"][i] != -1:
+                i = hex_map["run_start"][i]-1
+            if i-1 < 0:
+                return ("",start_index,end_index)
+            end_index = hex_map["prev_hex"][i-1]
+            if end_index == -1:
+                return ("",start_index,end_index)
+            hex_text,start_index = self.get_hex_ending_at(end_index,table=table)
+            return (hex_text, start_index, end_index)
         old_hex = True
         for i,line in enumerate(table.get("lines","")[index::-1]):
             if old_hex:
@@ -628,6 +1335,19 @@ class DSDT:
         # Returns the index of the next set of hex digits after the passed index
         start_index = -1
         end_index   = -1
+        hex_map = self.get_hex_map(table=table)
+        if hex_map and 0 <= index < len(hex_map["offset"]):
+            # Skip the hex run we're in, and the line that broke it
+            i = index
+            if hex_map["offset"][i] != -1:
+                i = hex_map["run_end"][i]+1
+            if i+1 >= len(hex_map["offset"]):
+                return ("",start_index,end_index)
+            start_index = hex_map["next_hex"][i+1]
+            if start_index == -1:
+                return ("",start_index,end_index)
+            hex_text,end_index = self.get_hex_starting_at(start_index,table=table)
+            return (hex_text, start_index, end_index)
         old_hex = True
         for i,line in enumerate(table.get("lines","")[index:]):
             if old_hex:
@@ -651,6 +1371,15 @@ class DSDT:
         # Returns a tuple of the hex, and the ending index
         hex_text = ""
         index = -1
+        hex_map = self.get_hex_map(table=table)
+        if hex_map and 0 <= start_index < len(hex_map["offset"]):
+            # Read the bytes of the hex run straight from the raw table
+            if hex_map["offset"][start_index] == -1:
+                return (hex_text, index)
+            index = hex_map["run_end"][start_index]
+            return (self.get_hex_text(table["raw"][
+                hex_map["offset"][start_index]:hex_map["offset"][index]+hex_map["size"][index]
+            ]), index)
         for i,x in enumerate(table.get("lines","")[start_index:]):
             if not self.is_hex(x):
                 break
@@ -664,6 +1393,15 @@ class DSDT:
         # Returns a tuple of the hex, and the ending index
         hex_text = ""
         index = -1
+        hex_map = self.get_hex_map(table=table)
+        if hex_map and 0 <= start_index < len(hex_map["offset"]):
+            # Read the bytes of the hex run straight from the raw table
+            if hex_map["offset"][start_index] == -1:
+                return (hex_text, index)
+            index = hex_map["run_start"][start_index]
+            return (self.get_hex_text(table["raw"][
+                hex_map["offset"][index]:hex_map["offset"][start_index]+hex_map["size"][start_index]
+            ]), index)
         for i,x in enumerate(table.get("lines","")[start_index::-1]):
             if not self.is_hex(x):
                 break
@@ -674,12 +1412,25 @@ class DSDT:
     def get_shortest_unique_pad(self, current_hex, index, instance=0, table=None):
         if not table: table = self.get_dsdt_or_only()
         if not table: return None
-        try:    left_pad  = self.get_unique_pad(current_hex, index, False, instance, table=table)
-        except: left_pad  = None
-        try:    right_pad = self.get_unique_pad(current_hex, index, True, instance, table=table)
-        except: right_pad = None
-        try:    mid_pad   = self.get_unique_pad(current_hex, index, None, instance, table=table)
-        except: mid_pad   = None
+        pads = None
+        try:
+            # Try to get all 3 directions from one query
+            located = self._locate_pad_start(current_hex, index, instance, table=table)
+            offset = self._get_pad_offset(located, index, table=table)
+            if offset is not None:
+                context = self.get_unique_context(offset, len(current_hex)//2, directions=(False,True,None), table=table)
+                pads = [self._get_pads(offset, len(current_hex)//2, context[x], table=table) for x in (False,True,None)]
+        except: pads = [None,None,None]
+        if pads is None:
+            # Couldn't map the hex to the raw table - check each direction individually
+            try:    left_pad  = self.get_unique_pad(current_hex, index, False, instance, table=table)
+            except: left_pad  = None
+            try:    right_pad = self.get_unique_pad(current_hex, index, True, instance, table=table)
+            except: right_pad = None
+            try:    mid_pad   = self.get_unique_pad(current_hex, index, None, instance, table=table)
+            except: mid_pad   = None
+            pads = [left_pad,right_pad,mid_pad]
+        left_pad,right_pad,mid_pad = pads
         if left_pad == right_pad == mid_pad is None: raise Exception("No unique pad found!")
         # We got at least one unique pad
         min_pad = None
@@ -689,11 +1440,102 @@ class DSDT:
                 min_pad = x
         return min_pad
 
-    def get_unique_pad(self, current_hex, index, direction=None, instance=0, table=None):
+    def get_occurrences(self, data, table=None):
         if not table: table = self.get_dsdt_or_only()
-        if not table: raise Exception("No valid table passed!")
-        # Returns any pad needed to make the passed patch unique
-        # direction can be True = forward, False = backward, None = both
+        if not table: return []
+        # Returns a sorted list of every offset the passed bytes are found at in
+        # the raw table - including overlapping matches.  Results are saved per
+        # table, as the same patterns tend to be checked repeatedly.
+        occurrences = self.get_index(table=table).setdefault("occurrences",{})
+        if not data in occurrences:
+            raw = table.get("raw",b"")
+            positions = []
+            i = raw.find(data) if data else -1
+            while i != -1:
+                positions.append(i)
+                i = raw.find(data,i+1)
+            occurrences[data] = positions
+        return occurrences[data]
+
+    def _is_unique(self, positions, length):
+        # Helper to emulate bytes.count() == 1 for the passed sorted match
+        # offsets - count() skips any matches that overlap a prior match
+        count = 0
+        end = None
+        for x in positions:
+            if end is None or x >= end:
+                count += 1
+                if count > 1:
+                    return False
+                end = x+length
+        return count == 1
+
+    def get_unique_context(self, offset, length, directions=(False,True,None), table=None):
+        if not table: table = self.get_dsdt_or_only()
+        if not table: return {}
+        # Returns a dict of direction -> (left,right) byte counts needed around
+        # raw[offset:offset+length] to make it unique in the table, or None if we
+        # hit the end of the listed hex first.  Directions are the same as
+        # get_unique_pad():  True = forward, False = backward, None = both.
+        # Rather than counting every candidate in the whole table, we get the
+        # matches once, then narrow them down as each byte is added.
+        raw = table["raw"]
+        lo,hi = self._get_hex_bounds(table=table)
+        matches = self.get_occurrences(raw[offset:offset+length],table=table)
+        context = {}
+        for direction in directions:
+            positions = matches
+            l = r = 0
+            while True:
+                if self._is_unique(positions,length+l+r): # Got it!
+                    context[direction] = (l,r)
+                    break
+                if direction == True or (direction is None and r<=l):
+                    # Let's check a forward byte
+                    end = offset+length+r
+                    if end >= hi:
+                        context[direction] = None
+                        break
+                    check = raw[end:end+1]
+                    size = length+l+r
+                    positions = [x for x in positions if raw[x+size:x+size+1] == check]
+                    r += 1
+                    continue
+                if direction == False or (direction is None and l<=r):
+                    # Let's check a backward byte
+                    start = offset-l-1
+                    if start < lo:
+                        context[direction] = None
+                        break
+                    check = raw[start:start+1]
+                    positions = [x-1 for x in positions if x > 0 and raw[x-1:x] == check]
+                    l += 1
+                    continue
+                context[direction] = None
+                break
+        return context
+
+    def _get_hex_bounds(self, table=None):
+        # Returns the first and last+1 AML offsets covered by the hex lines
+        hex_map = self.get_hex_map(table=table)
+        if not hex_map or hex_map["next_hex"][0] == -1:
+            return (0,0)
+        first = hex_map["next_hex"][0]
+        last  = hex_map["prev_hex"][-1]
+        return (hex_map["offset"][first],hex_map["offset"][last]+hex_map["size"][last])
+
+    def _get_pads(self, offset, length, context, table=None):
+        # Returns the (padl,padr) hex strings for the passed context
+        if context is None:
+            return None
+        l,r = context
+        raw = table["raw"]
+        return (self.get_hex_text(raw[offset-l:offset]),self.get_hex_text(raw[offset+length:offset+length+r]))
+
+    def _locate_pad_start(self, current_hex, index, instance=0, table=None):
+        # Loads the hex starting at index until we find current_hex, and returns
+        # a tuple of the hex left and right of the target instance, along with
+        # the first and last line indexes loaded
         start_index = index
         line,last_index = self.get_hex_starting_at(index,table=table)
         if last_index == -1:
@@ -711,13 +1553,42 @@ class DSDT:
             line += new_line
         if not current_hex in line:
             raise Exception("{} not found in table at index {}-{}!".format(current_hex,start_index,last_index))
-        padl = padr = ""
         parts = line.split(current_hex)
         if instance >= len(parts)-1:
             raise Exception("Instance out of range!")
         linel = current_hex.join(parts[0:instance+1])
         liner = current_hex.join(parts[instance+1:])
-        last_check = True # Default to forward
+        return (linel,liner,start_index,last_index)
+
+    def _get_pad_offset(self, located, index, table=None):
+        # Returns the AML offset of the located hex if we can check it against
+        # the raw table directly - or None if we need to walk the lines.  This
+        # requires the hex to be byte aligned, index to start a hex run, and the
+        # hex runs to cover the table contiguously.
+        hex_map = self.get_hex_map(table=table)
+        if not hex_map or not hex_map.get("contiguous"):
+            return None
+        if not 0 <= index < len(hex_map["offset"]) or hex_map["run_start"][index] != index:
+            return None
+        if len(located[0]) % 2:
+            return None
+        return hex_map["offset"][index]+len(located[0])//2
+
+    def get_unique_pad(self, current_hex, index, direction=None, instance=0, table=None):
+        if not table: table = self.get_dsdt_or_only()
+        if not table: raise Exception("No valid table passed!")
+        # Returns any pad needed to make the passed patch unique
+        # direction can be True = forward, False = backward, None = both
+        located = self._locate_pad_start(current_hex, index, instance, table=table)
+        offset = self._get_pad_offset(located, index, table=table)
+        if offset is not None and len(current_hex) % 2 == 0:
+            # Check the raw table directly
+            context = self.get_unique_context(offset, len(current_hex)//2, directions=(direction,), table=table)
+            pads = self._get_pads(offset, len(current_hex)//2, context.get(direction), table=table)
+            if pads is None: raise Exception("Hit end of file before unique hex was found!")
+            return pads
+        linel,liner,start_index,last_index = located
+        padl = padr = ""
         while True:
             # Check if our hex string is unique
             check_bytes = self.get_hex_bytes(padl+current_hex+padr)
@@ -769,51 +1640,126 @@ class DSDT:
     def get_scope(self,starting_index=0,add_hex=False,strip_comments=False,table=None):
         if not table: table = self.get_dsdt_or_only()
         if not table: return []
-        # Walks the scope starting at starting_index, and returns when
-        # we've exited
-        brackets = None
-        scope = []
-        for line in table.get("lines","")[starting_index:]:
-            if self.is_hex(line):
-                if add_hex:
-                    scope.append(line)
-                continue
-            line = self.get_line(line) if strip_comments else line
-            scope.append(line)
-            if brackets is None:
-                if line.count("{"):
-                    brackets = line.count("{")
-                continue
-            brackets = brackets + line.count("{") - line.count("}")
-            if brackets <= 0:
-                # We've exited the scope
-                return scope
-        return scope
+        # Returns the lines of the scope starting at starting_index - up to
+        # and including the line that closes it
+        index = self.get_index(table=table)
+        lines = table.get("lines",[])
+        if not 0 <= starting_index < len(lines):
+            return []
+        scope_ends = self.get_scope_ends(strip_comments=strip_comments,table=table)
+        start = scope_ends["next_open"][starting_index]
+        end = scope_ends["ends"][start] if start > -1 else -1
+        # Run to the end of the table if the scope never closes
+        end = len(lines) if end == -1 else end+1
+        hex_lines = index["hex"]
+        if not strip_comments:
+            if add_hex:
+                return lines[starting_index:end]
+            return [lines[i] for i in range(starting_index,end) if not hex_lines[i]]
+        # Hex lines are never stripped - so pull those from the table
+        stripped = self.get_stripped_lines(table=table)
+        return [lines[i] if hex_lines[i] else stripped[i] for i in range(starting_index,end) if add_hex or not hex_lines[i]]
 
-    def get_scopes(self, table=None):
+    def scope_text(self,starting_index=0,add_hex=False,strip_comments=False,table=None):
         if not table: table = self.get_dsdt_or_only()
-        if not table: return []
-        scopes = []
-        for index,line in enumerate(table.get("lines","")):
-            if self.is_hex(line): continue
-            if any(x in line for x in ("Processor (","Scope (","Device (","Method (","Name (")):
-                scopes.append((line,index))
-        return scopes
+        if not table: return ""
+        # Returns the scope from get_scope() joined by newlines - saved per
+        # table and starting index, as we tend to check the same ones often
+        cache = self.get_index(table=table).setdefault("scope_text",{})
+        key = (starting_index,add_hex,strip_comments)
+        if not key in cache:
+            cache[key] = "\n".join(self.get_scope(starting_index,add_hex=add_hex,strip_comments=strip_comments,table=table))
+        return cache[key]
 
-    def get_paths(self, table=None):
+    def get_stripped_lines(self, table=None):
         if not table: table = self.get_dsdt_or_only()
         if not table: return []
-        # Set up lists for complete paths, as well
-        # as our current path reference
+        # Returns the table's lines with comments stripped per get_line() -
+        # hex lines are left empty
+        return self.get_index(table=table)["stripped"]
+
+    def build_scope_ends(self, lines, hex_lines):
+        # Walks the passed lines once, counting brackets the way get_scope()
+        # always has.  Returns a dict with the first line at or after each
+        # line that opens a bracket ("next_open"), and the line that closes
+        # the scope opened on each of those ("ends") - or -1 for either if
+        # there isn't one.
+        next_open = array.array("l",[-1])*len(lines)
+        ends      = array.array("l",[-1])*len(lines)
+        pending   = [] # Heap of (-closing depth, opening line)
+        brackets  = 0
+        waiting   = 0
+        for i in range(len(lines)):
+            if hex_lines[i]:
+                continue
+            line = lines[i]
+            opens = line.count("{")
+            brackets += opens - line.count("}")
+            # Close any scopes we've dropped back out of
+            while pending and -pending[0][0] >= brackets:
+                ends[heapq.heappop(pending)[1]] = i
+            if opens:
+                heapq.heappush(pending,(opens-brackets,i))
+                for j in range(waiting,i+1):
+                    next_open[j] = i
+                waiting = i+1
+        return {"next_open":next_open,"ends":ends}
+
+    def get_scope_ends(self, strip_comments=False, table=None):
+        if not table: table = self.get_dsdt_or_only()
+        if not table: return {}
+        # Returns the scope ends for the table's lines - with or without
+        # comments, as we count brackets in whichever get_scope() returns
+        index = self.get_index(table=table)
+        scope_ends = index.setdefault("scope_ends",{})
+        if not strip_comments in scope_ends:
+            lines = self.get_stripped_lines(table=table) if strip_comments else table.get("lines",[])
+            scope_ends[strip_comments] = self.build_scope_ends(lines,index["hex"])
+        return scope_ends[strip_comments]
+
+    def parse_table(self, table=None):
+        if not table: table = self.get_dsdt_or_only()
+        if not table: return {}
+        # Walks each line of the table once and returns a dict containing
+        # the scopes, fully qualified paths, bracket depth after each line,
+        # whether or not each line is hex, and each line with comments
+        # stripped (hex lines are left empty)
+        lines      = table.get("lines",[])
+        get_hex    = getattr(lines,"get_hex",None)
+        scopes     = []
+        stripped   = []
+        hex_lines  = bytearray(len(lines))
+        depth      = array.array("i",[0])*len(lines)
+        offset     = array.array("l",[-1])*len(lines)
+        size       = array.array("H",[0])*len(lines)
+        # Set up lists for complete paths and Scope () paths,
+        # as well as our current path reference
         path_list  = []
+        scope_list = []
         _path      = []
         brackets = 0
-        for i,line in enumerate(table.get("lines",[])):
-            if self.is_hex(line):
-                # Skip hex
+        for i in range(len(lines)):
+            # Listings already know where their hex lines point
+            hex_info = get_hex(i) if get_hex else None
+            line = None if hex_info else lines[i]
+            if hex_info or self.is_hex(line):
+                # Flag and skip hex - saving the address and number of bytes
+                hex_lines[i] = 1
+                depth[i] = brackets
+                if hex_info:
+                    offset[i],size[i] = hex_info
+                else:
+                    addr,_,hexs = line.partition(":")
+                    offset[i] = int(addr,16)
+                    size[i] = len(hexs.split("//")[0].split())
+                stripped.append("")
                 continue
+            if any(x in line for x in ("Processor (","Scope (","Device (","Method (","Name (")):
+                scopes.append((line,i))
             line = self.get_line(line)
+            stripped.append(line)
             brackets += line.count("{")-line.count("}")
+            depth[i] = brackets
             while len(_path):
                 # Remove any path entries that are nested
                 # equal to or further than our current set
@@ -826,10 +1772,8 @@ class DSDT:
                 # Add our path entry and save the full path
                 # to the path list as needed
                 _path.append((type_match.group("name"),brackets))
-                if type_match.group("type") == "Scope":
-                    continue
-                # Ensure that we only consider non-Scope paths that aren't
-                # already fully qualified with a \ prefix
+                # Ensure that we only consider paths that aren't already
+                # fully qualified with a \ prefix
                 path = []
                 for p in _path[::-1]:
                     path.append(p[0])
@@ -853,24 +1797,292 @@ class DSDT:
                 # Ensure we strip trailing underscores for consistency
                 padded_path = [("\\" if j==0 else"")+x.lstrip("\\").rstrip("_") for j,x in enumerate(path)]
                 path_str = ".".join(padded_path)
-                path_list.append((path_str,i,type_match.group("type")))
-        return sorted(path_list)
+                # Scope () sets only extend existing objects - keep them
+                # separate from the paths that define them
+                if type_match.group("type") == "Scope":
+                    scope_list.append((path_str,i,"Scope"))
+                else:
+                    path_list.append((path_str,i,type_match.group("type")))
+        return {
+            "scopes": scopes,
+            "paths":  sorted(path_list),
+            "scope_paths": sorted(scope_list),
+            "stripped": listing.Listing(stripped),
+            "hex":    hex_lines,
+            "depth":  depth,
+            "offset": offset,
+            "size":   size
+        }
 
-    def get_path_of_type(self, obj_type="Device", obj="HPET", table=None):
+    def build_hex_map(self, parsed, raw):
+        # Builds a map of each line to the AML offset and size of its hex
+        # data, the bounds of the hex run it's in, and the nearest hex lines
+        # before and after it.  Returns None if the addresses don't line up
+        # with the raw table, so callers fall back on reading the lines.
+        hex_lines = parsed.get("hex",bytearray())
+        offset    = parsed.get("offset",array.array("l"))
+        size      = parsed.get("size",array.array("H"))
+        total     = len(hex_lines)
+        if raw is None or len(offset) != total:
+            return None
+        run_start = array.array("l",[-1])*total
+        run_end   = array.array("l",[-1])*total
+        prev_hex  = array.array("l",[-1])*total
+        next_hex  = array.array("l",[-1])*total
+        start = last = -1
+        for i in range(total):
+            if hex_lines[i]:
+                if offset[i] < 0 or offset[i]+size[i] > len(raw):
+                    return None # Out of bounds
+                if i and hex_lines[i-1]:
+                    if offset[i] != offset[i-1]+size[i-1]:
+                        return None # Not contiguous
+                else:
+                    start = i
+                run_start[i] = start
+                last = i
+            prev_hex[i] = last
+        # Make sure each hex run picks up where the last one left off
+        contiguous = True
+        last = -1
+        for i in range(total):
+            if hex_lines[i] and run_start[i] == i:
+                if last != -1 and offset[i] != offset[last]+size[last]:
+                    contiguous = False
+                    break
+            if hex_lines[i]:
+                last = i
+        end = last = -1
+        for i in range(total-1,-1,-1):
+            if hex_lines[i]:
+                if not (i+1 < total and hex_lines[i+1]):
+                    end = i
+                run_end[i] = end
+                last = i
+            next_hex[i] = last
+        return {
+            "offset":    offset,
+            "size":      size,
+            "run_start": run_start,
+            "run_end":   run_end,
+            "prev_hex":  prev_hex,
+            "next_hex":  next_hex,
+            "contiguous": contiguous
+        }
+
+    def get_hex_map(self, table=None):
+        if not table: table = self.get_dsdt_or_only()
+        if not table: return None
+        # Returns the line to AML offset map for the passed table, or None if
+        # we don't have one
+        return self.get_index(table=table).get("hex_map")
+
+    def normalize_path(self, path):
+        # Strips trailing underscores and uppercases each path element
+        return ".".join([x.rstrip("_").upper() for x in path.split(".")])
+
+    def build_index(self, parsed, raw=None, lines=None):
+        # Builds the per-table index our queries use from the results of
+        # parse_table() - paths are grouped by lowercase type and by path
+        # string, retaining their sort order.  Normalized paths are also
+        # keyed by (type, every suffix of their last element) and by
+        # (type, full path) - with None as the type for all types - and the
+        # Scope () sets that extend each full path are kept too.  If we
+        # have the lines, each quoted value on a path's line (string ids and
+        # EisaIds alike) maps back to the paths that declared it.
+        by_type   = {}
+        by_path   = {}
+        by_suffix = {}
+        by_norm   = {}
+        by_id     = {}
+        scopes_by_norm = {}
+        for path in parsed.get("scope_paths",[]):
+            scopes_by_norm.setdefault(self.normalize_path(path[0]),[]).append(path)
+        for path in parsed.get("paths",[]):
+            if lines:
+                try:
+                    for value in set(self.id_match.findall(lines[path[1]])):
+                        by_id.setdefault(value,[]).append(path)
+                except IndexError:
+                    pass
+            by_type.setdefault(path[2].lower(),[]).append(path)
+            by_path.setdefault(path[0],[]).append(path)
+            norm = self.normalize_path(path[0])
+            last = norm.split(".")[-1]
+            for obj_type in (path[2].lower(),None):
+                by_norm.setdefault((obj_type,norm),[]).append(path)
+                for i in range(len(last)+1):
+                    by_suffix.setdefault((obj_type,last[i:]),[]).append((norm,path))
+        return {
+            "hex":       parsed.get("hex",bytearray()),
+            "depth":     parsed.get("depth",array.array("i")),
+            "by_type":   by_type,
+            "by_path":   by_path,
+            "by_suffix": by_suffix,
+            "by_norm":   by_norm,
+            "by_id":     by_id,
+            "scopes_by_norm": scopes_by_norm,
+            "hex_map":   self.build_hex_map(parsed,raw),
+            "stripped":  parsed.get("stripped",[]),
+            # Scopes are most often walked with comments stripped - so we
+            # match up their brackets up front
+            "scope_ends": {True:self.build_scope_ends(parsed.get("stripped",[]),parsed.get("hex",bytearray()))}
+        }
+
+    def get_index(self, table=None):
+        if not table: table = self.get_dsdt_or_only()
+        if not table: return self.build_index({})
+        # Returns the index for the passed table - building it if needed,
+        # which happens when tables are restored from our cache
+        if not "index" in table:
+            table["index"] = self.build_index(self.parse_table(table=table),raw=table.get("raw"),lines=table.get("lines"))
+        return table["index"]
+
+    def get_aml(self, table=None):
+        if not table: table = self.get_dsdt_or_only()
+        if not table: return None
+        # Returns the namespace decoded from the table's raw AML (see
+        # aml.AML.parse()) - or None if it's not a DSDT/SSDT, or it couldn't
+        # be decoded.  Results are saved in the table for reuse.
+        if not "aml" in table:
+            raw = table.get("raw")
+            table["aml"] = None
+            if raw and raw[:4] in self.mixed_listing:
+                try: table["aml"] = self.aml.parse(raw)
+                except aml.AMLError: pass
+        return table["aml"]
+
+    def get_line_for_offset(self, offset, obj_type, table=None):
+        if not table: table = self.get_dsdt_or_only()
+        if not table: return None
+        # Maps an AML offset to the listing line that declares the object of
+        # the passed type there - or None if we can't place it
+        hex_map = self.get_hex_map(table=table)
+        if not hex_map:
+            return None
+        index = self.get_index(table=table)
+        if not "hex_starts" in index:
+            # Sorted (offset, line) tuples for each hex line
+            index["hex_starts"] = sorted((o,i) for i,o in enumerate(hex_map["offset"]) if index["hex"][i])
+        hex_starts = index["hex_starts"]
+        i = bisect.bisect_right(hex_starts,(offset,len(hex_map["offset"])))-1
+        if i < 0:
+            return None
+        line = hex_starts[i][1]
+        if not offset < hex_map["offset"][line]+hex_map["size"][line]:
+            return None
+        lines = table.get("lines",[])
+        # The declaring line sits next to its hex run - check above it first,
+        # then below it
+        for check in (
+            range(hex_map["run_start"][line]-1,-1,-1),
+            range(hex_map["run_end"][line]+1,len(lines))
+        ):
+            for j in check:
+                if index["hex"][j]:
+                    break
+                type_match = self.type_match.match(self.get_line(lines[j]))
+                if type_match and type_match.group("type") == obj_type:
+                    return j
+        return None
+
+    def get_aml_paths(self, table=None):
         if not table: table = self.get_dsdt_or_only()
         if not table: return []
+        # Returns the natively decoded paths as (path, line, type) tuples like
+        # get_paths() does.  If we have a listing, offsets are mapped to their
+        # lines (and any we can't place are left out), otherwise the AML
+        # offsets are returned in place of line numbers.
+        decoded = self.get_aml(table=table)
+        if not decoded:
+            return []
+        if not table.get("lines"):
+            return list(decoded["paths"])
         paths = []
+        for path,offset,obj_type in decoded["paths"]:
+            line = self.get_line_for_offset(offset,obj_type,table=table)
+            if line is not None:
+                paths.append((path,line,obj_type))
+        return sorted(paths)
+
+    def get_aml_ids(self, table=None):
+        if not table: table = self.get_dsdt_or_only()
+        if not table: return {}
+        # Returns a dict of device path -> {"_HID", "_CID", "_ADR", "_UID"}
+        # values decoded from Name objects in the AML
+        decoded = self.get_aml(table=table)
+        return decoded["ids"] if decoded else {}
+
+    def get_aml_index(self, table=None):
+        if not table: table = self.get_dsdt_or_only()
+        if not table: return None
+        # Returns an index like get_index() builds, but from the natively
+        # decoded paths and ids - or None if the table couldn't be decoded, or
+        # if some of its paths couldn't be placed in its listing, so callers
+        # fall back on the listing instead of missing them.  Only string ids
+        # are kept - AML.parse() has already turned any EisaId integers into
+        # their strings, and listings don't quote other integers either.
+        if not "aml_index" in table:
+            table["aml_index"] = None
+            decoded = self.get_aml(table=table)
+            paths = self.get_aml_paths(table=table) if decoded else []
+            if decoded and len(paths) == len(decoded["paths"]):
+                index = self.build_index({"paths":paths})
+                by_path,by_id = index["by_path"],index["by_id"]
+                for dev,ids in self.get_aml_ids(table=table).items():
+                    for id_type,values in ids.items():
+                        if not isinstance(values,list): values = [values]
+                        for value in set(x for x in values if isinstance(x,str)):
+                            for path in by_path.get(dev+"."+id_type,[]):
+                                by_id.setdefault(value,[]).append(path)
+                table["aml_index"] = index
+        return table["aml_index"]
+
+    def get_query_index(self, table=None):
+        # Returns the index our path and id queries use - the natively decoded
+        # one if use_aml is set and the table decodes, otherwise the one built
+        # from the listing
+        if self.use_aml:
+            index = self.get_aml_index(table=table)
+            if index: return index
+        return self.get_index(table=table)
+
+    def get_scopes(self, table=None):
+        if not table: table = self.get_dsdt_or_only()
+        if not table: return []
+        # Loaded tables build these once, the first time they're needed -
+        # anything else gets parsed here
+        if "scopes" in table:
+            return table["scopes"]
+        return self.parse_table(table=table)["scopes"]
+
+    def get_paths(self, table=None):
+        if not table: table = self.get_dsdt_or_only()
+        if not table: return []
+        # Loaded tables build these once, the first time they're needed -
+        # anything else gets parsed here
+        if "paths" in table:
+            return table["paths"]
+        return self.parse_table(table=table)["paths"]
+
+    def get_path_of_type(self, obj_type="Device", obj="HPET", table=None):
+        if not table: table = self.get_dsdt_or_only()
+        if not table: return []
         # Remove trailing underscores and normalize case for all path
         # elements passed
-        obj = ".".join([x.rstrip("_").upper() for x in obj.split(".")])
-        obj_type = obj_type.lower() if obj_type else obj_type
-        for path in table.get("paths",[]):
-            path_check = ".".join([x.rstrip("_").upper() for x in path[0].split(".")])
-            if (obj_type and obj_type != path[2].lower()) or not path_check.endswith(obj):
-                # Type or object mismatch - skip
-                continue
-            paths.append(path)
-        return sorted(paths)
+        obj = self.normalize_path(obj)
+        obj_type = obj_type.lower() if obj_type else None
+        index = self.get_query_index(table=table)
+        if obj.startswith("\\"):
+            # Fully qualified - only an exact match will do
+            return sorted(index["by_norm"].get((obj_type,obj),[]))
+        # Any path ending with obj has a last element ending with obj's last
+        # element - so we only need to check those
+        check_paths = index["by_suffix"].get((obj_type,obj.split(".")[-1]),[])
+        if not "." in obj:
+            # Matching the last element is all we need
+            return sorted(x[1] for x in check_paths)
+        return sorted(x[1] for x in check_paths if x[0].endswith(obj))
 
     def get_device_paths(self, obj="HPET",table=None):
         return self.get_path_of_type(obj_type="Device",obj=obj,table=table)
@@ -884,7 +2096,7 @@ class DSDT:
     def get_processor_paths(self, obj_type="Processor",table=None):
         return self.get_path_of_type(obj_type=obj_type,obj="",table=table)
 
-    def get_device_paths_with_id(self,_id="PNP0A03",id_types=("_HID","_CID"),table=None):
+    def get_device_paths_with_id(self,_id="PNP0A03",id_types=("_HID","_CID"),table=None,partial=True):
         if not table: table = self.get_dsdt_or_only()
         if not table: return []
         if not isinstance(id_types,(list,tuple)): return []
@@ -892,29 +2104,145 @@ class DSDT:
         id_types = [x.upper() for x in id_types if isinstance(x,str)]
         if not id_types: return []
         _id = _id.upper() # Ensure case
-        devs = []
-        for p in table.get("paths",[]):
-            try:
-                for type_check in id_types:
-                    if p[0].endswith(type_check) and _id in table.get("lines")[p[1]]:
-                        # Save the path, strip the suffix and trailing periods
-                        devs.append(p[0][:-len(type_check)].rstrip("."))
-                        # Leave this loop to avoid adding the same device
-                        # multiple times
-                        break
-            except Exception as e:
-                print(e)
-                continue
+        index = self.get_query_index(table=table)
+        by_id = index["by_id"]
+        # Ids are always quoted in the listing - so we only need to check
+        # each distinct quoted value for the id.  Any value containing it
+        # matches, unless partial is False and only an exact match will do -
+        # which is a single lookup.
+        if _id:
+            matches = list(by_id.get(_id,[]))
+            if partial:
+                for value in by_id:
+                    if _id in value and value != _id:
+                        matches.extend(by_id[value])
+        else:
+            # An empty id matches everything
+            matches = [p for paths in index["by_path"].values() for p in paths]
+        devs = set()
+        for p in matches:
+            type_check = next((x for x in id_types if p[0].endswith(x)),None)
+            if type_check:
+                # Save the path, strip the suffix and trailing periods
+                devs.add(p[0][:-len(type_check)].rstrip("."))
         devices = []
-        # Walk the paths again - and save any devices
+        # Look up the paths in our index - and save any devices
         # that match our prior list
-        for p in table.get("paths",[]):
-            if p[0] in devs and p[-1] == "Device":
-                devices.append(p)
-        return devices
+        by_path = index["by_path"]
+        for dev in devs:
+            devices.extend([p for p in by_path.get(dev,[]) if p[-1] == "Device"])
+        return sorted(devices)
 
     def get_device_paths_with_cid(self,cid="PNP0A03",table=None):
         return self.get_device_paths_with_id(_id=cid,id_types=("_CID",),table=table)
 
     def get_device_paths_with_hid(self,hid="ACPI000E",table=None):
         return self.get_device_paths_with_id(_id=hid,id_types=("_HID",),table=table)
+
+    def sorted_nicely(self, l):
+        convert = lambda text: int(text) if text.isdigit() else text
+        alphanum_key = lambda key: [ convert(c) for c in re.split('([0-9]+)', key.lower()) ]
+        return sorted(l, key = alphanum_key)
+
+    def _remove_from_namespace(self, table_name):
+        ns = self.namespace
+        entry = ns["tables"].pop(table_name,None)
+        if not entry: return
+        # Drop only the keys this table contributed
+        for kind in ("by_suffix","by_norm","by_id","scopes_by_norm"):
+            merged = ns[kind]
+            for key in entry["index"][kind]:
+                tables = merged.get(key)
+                if tables is None: continue
+                tables.pop(table_name,None)
+                if not tables: merged.pop(key,None)
+
+    def _add_to_namespace(self, table_name, table):
+        ns = self.namespace
+        index = self.get_index(table=table)
+        ns["tables"][table_name] = {"table":table,"index":index}
+        # Each key maps to {table_name: value} - so a single lookup tells us
+        # every table with a hit
+        for kind in ("by_suffix","by_norm","by_id","scopes_by_norm"):
+            merged = ns[kind]
+            for key,value in index[kind].items():
+                merged.setdefault(key,{})[table_name] = value
+
+    def update_namespace(self):
+        # Brings the merged namespace of all loaded DSDT/SSDT tables in line
+        # with acpi_tables - only tables added, replaced, or removed since the
+        # last call are touched.  Returns the namespace.
+        ns = self.namespace
+        changed = False
+        for table_name in list(ns["tables"]):
+            if self.acpi_tables.get(table_name) is not ns["tables"][table_name]["table"]:
+                self._remove_from_namespace(table_name)
+                changed = True
+        for table_name,table in self.acpi_tables.items():
+            if table_name in ns["tables"] or not table.get("signature") in self.mixed_listing:
+                continue
+            self._add_to_namespace(table_name,table)
+            changed = True
+        if changed:
+            # Natural sort the table names once here, rather than per query
+            ns["rank"] = dict((x,i) for i,x in enumerate(self.sorted_nicely(ns["tables"])))
+        return ns
+
+    def _namespace_results(self, results, by_table=False):
+        # Takes a list of (table_name, [paths]) tuples and returns them in
+        # table order - either grouped, or as flat (table_name, path) tuples
+        rank = self.namespace["rank"]
+        results = sorted([x for x in results if x[1]],key=lambda x:rank[x[0]])
+        if by_table:
+            return results
+        return [(table_name,path) for table_name,paths in results for path in paths]
+
+    def get_namespace_paths(self, obj_type="Device", obj="HPET", by_table=False):
+        # Cross-table get_path_of_type() - returns (table_name, path) tuples
+        # for every loaded DSDT/SSDT, in table order
+        ns = self.update_namespace()
+        obj = self.normalize_path(obj)
+        obj_type = obj_type.lower() if obj_type else None
+        if obj.startswith("\\"):
+            hits = ns["by_norm"].get((obj_type,obj),{})
+            results = [(x,sorted(hits[x])) for x in hits]
+        else:
+            hits = ns["by_suffix"].get((obj_type,obj.split(".")[-1]),{})
+            results = [(x,sorted(y[1] for y in hits[x] if not "." in obj or y[0].endswith(obj))) for x in hits]
+        return self._namespace_results(results,by_table=by_table)
+
+    def get_namespace_paths_with_id(self, _id="PNP0A03", id_types=("_HID","_CID"), by_table=False, partial=True):
+        # Cross-table get_device_paths_with_id() - _id can also be a list of
+        # ids, which are returned in that order within each table
+        ns = self.update_namespace()
+        ids = [x.upper() for x in (_id if isinstance(_id,(list,tuple)) else (_id,))]
+        # Only tables with a quoted value matching one of our ids can match
+        table_names = set()
+        for i in ids:
+            if not i:
+                table_names.update(ns["tables"])
+            elif not partial:
+                table_names.update(ns["by_id"].get(i,{}))
+            else:
+                for value,tables in ns["by_id"].items():
+                    if i in value:
+                        table_names.update(tables)
+        results = []
+        for table_name in table_names:
+            table = ns["tables"][table_name]["table"]
+            paths = []
+            for i in ids:
+                paths.extend(self.get_device_paths_with_id(_id=i,id_types=id_types,table=table,partial=partial))
+            results.append((table_name,paths))
+        return self._namespace_results(results,by_table=by_table)
+
+    def get_namespace_object(self, path):
+        # Returns where the passed fully qualified path was defined, and
+        # which Scope () sets extended it, as lists of (table_name, line,
+        # type) tuples in table order
+        ns = self.update_namespace()
+        norm = self.normalize_path(path)
+        obj = {"path":norm}
+        for key,hits in (("defined",ns["by_norm"].get((None,norm),{})),("scopes",ns["scopes_by_norm"].get(norm,{}))):
+            obj[key] = [(table_name,p[1],p[2]) for table_name,p in self._namespace_results([(x,sorted(hits[x])) for x in hits])]
+        return obj
@@ -0,0 +1,34 @@
+class LazyTable(dict):
+
+    def __init__(self, loaders = None, *args, **kwargs):
+        # A dict whose missing keys can be filled in on first access - each
+        # loader is called with the table, and returns the value for its key.
+        # Loaders may also set other keys while they're at it.  Hits and
+        # misses are counted per key.
+        dict.__init__(self, *args, **kwargs)
+        self.loaders = loaders or {}
+        self.hits = {}
+        self.misses = {}
+
+    def __getitem__(self, key):
+        if dict.__contains__(self, key):
+            self.hits[key] = self.hits.get(key,0)+1
+            return dict.__getitem__(self, key)
+        if not key in self.loaders:
+            raise KeyError(key)
+        self.misses[key] = self.misses.get(key,0)+1
+        value = self.loaders[key](self)
+        dict.__setitem__(self, key, value)
+        return value
+
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or key in self.loaders
+
+    def get(self, key, default = None):
+        if not key in self:
+            return default
+        return self[key]
+
+    def is_loaded(self, key):
+        # Returns whether the key has a value yet - without loading it
+        return dict.__contains__(self, key)
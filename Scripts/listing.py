@@ -0,0 +1,115 @@
+import re, binascii, array
+
+class Listing:
+
+    def __init__(self, lines = (), raw = None):
+        # Holds the lines of a disassembled table in a single string, along
+        # with the offset each line starts at.  If we have the raw table,
+        # hex lines from a mixed listing are kept as the offset and size of
+        # their bytes instead - and formatted again when asked for.  Any that
+        # wouldn't come back out exactly as they went in stay as text.
+        self.raw = raw
+        self.hex_match = re.compile(r"^( *)([0-9A-F]{4,}):((?: [0-9A-F]{2})+)(?:( +)// (.*))?$")
+        self.starts = array.array("I",[0])
+        self.hex_offset = array.array("l")
+        self.hex_size = array.array("H")
+        # Leading spaces, and spaces before the comment (0 = no comment)
+        self.hex_indent = array.array("B")
+        self.hex_gap = array.array("B")
+        self.text = ""
+        self.extend(lines)
+
+    def extend(self, lines):
+        # Adds the passed lines to the end of the listing
+        parts = []
+        total = self.starts[-1]
+        for line in lines:
+            hex_info = self._get_hex_info(line)
+            if hex_info:
+                offset,size,indent,gap = hex_info
+            else:
+                offset,size,indent,gap = -1,0,0,0
+                parts.append(line)
+                total += len(line)
+            self.starts.append(total)
+            self.hex_offset.append(offset)
+            self.hex_size.append(size)
+            self.hex_indent.append(indent)
+            self.hex_gap.append(gap)
+        self.text += "".join(parts)
+
+    def _get_hex_info(self, line):
+        # Returns a tuple of the offset, size, indent, and comment gap if we
+        # can rebuild the passed line from the raw table - or None if not
+        if self.raw is None or not ":" in line:
+            return None
+        match = self.hex_match.match(line)
+        if not match:
+            return None
+        indent,addr,hexs,gap,_ = match.groups()
+        offset = int(addr,16)
+        data = binascii.unhexlify(hexs.replace(" ",""))
+        if len(indent) > 0xFF or (gap and len(gap) > 0xFF) or len(data) > 0xFFFF:
+            return None
+        if self.raw[offset:offset+len(data)] != data:
+            return None
+        info = (offset,len(data),len(indent),len(gap) if gap else 0)
+        if self._format_hex(*info) != line:
+            return None
+        return info
+
+    def _format_hex(self, offset, size, indent, gap):
+        data = bytearray(self.raw[offset:offset+size])
+        line = "{}{:04X}:{}".format(
+            " "*indent,
+            offset,
+            "".join(" {:02X}".format(b) for b in data)
+        )
+        if gap:
+            line += "{}// {}".format(
+                " "*gap,
+                "".join(chr(b) if 32 <= b < 127 else "." for b in data)
+            )
+        return line
+
+    def get_hex(self, index):
+        # Returns a tuple of the AML offset and size of the bytes on the line
+        # at the passed index - or None if it's kept as text
+        if self.hex_offset[index] == -1:
+            return None
+        return (self.hex_offset[index],self.hex_size[index])
+
+    def _get_line(self, index):
+        if self.hex_offset[index] != -1:
+            return self._format_hex(self.hex_offset[index],self.hex_size[index],self.hex_indent[index],self.hex_gap[index])
+        return self.text[self.starts[index]:self.starts[index+1]]
+
+    def __len__(self):
+        return len(self.hex_offset)
+
+    def __getitem__(self, index):
+        if isinstance(index,slice):
+            return [self._get_line(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("Listing index out of range")
+        return self._get_line(index)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self._get_line(i)
+
+    def __str__(self):
+        return "\n".join(self)
+
+    def contains(self, value):
+        # Checks if value is anywhere in the full listing - only formatting
+        # the hex lines if we don't find it in the text ones first
+        if "\n" in value:
+            return value in str(self)
+        if value in self.text:
+            # Make sure it wasn't only found across two lines
+            if any(value in self.text[self.starts[i]:self.starts[i+1]] for i in range(len(self)) if self.hex_offset[i] == -1):
+                return True
+        return any(value in self._get_line(i) for i in range(len(self)) if self.hex_offset[i] != -1)
@@ -0,0 +1,31 @@
+class Matcher:
+
+    def __init__(self, patterns = ()):
+        # Finds every occurrence of any number of byte patterns in the data.
+        # Each distinct pattern gets its own bytes.find() scan - which runs in
+        # C, and for the few hundred patterns we deal with is much faster than
+        # walking the data a byte at a time in python.  Patterns with the same
+        # bytes are only searched for once.
+        self.patterns = [bytes(p) for p in patterns]
+        self.indexes = {}
+        for i,pattern in enumerate(self.patterns):
+            if not pattern:
+                continue # Empty patterns never match
+            self.indexes.setdefault(pattern,[]).append(i)
+
+    def find_all(self, data):
+        # Returns a dict of pattern index -> list of offsets where that
+        # pattern was found in data - overlapping matches included.  Indexes
+        # of patterns that weren't found are left out.
+        data = bytes(data)
+        found = {}
+        for pattern,indexes in self.indexes.items():
+            offsets = []
+            offset = data.find(pattern)
+            while offset != -1:
+                offsets.append(offset)
+                offset = data.find(pattern,offset+1)
+            if offsets:
+                for index in indexes:
+                    found[index] = list(offsets)
+        return found
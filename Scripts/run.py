@@ -1,78 +1,133 @@
-import sys, subprocess, time, threading, shlex
+import sys, os, subprocess, time, threading, shlex, codecs, locale, multiprocessing
+from multiprocessing.pool import ThreadPool
 try:
     from Queue import Queue, Empty
 except:
     from queue import Queue, Empty
+try:
+    import selectors
+except:
+    selectors = None
 
 ON_POSIX = 'posix' in sys.builtin_module_names
 
 class Run:
 
     def __init__(self):
+        # Max bytes to read from a streamed pipe at once
+        self.chunk_size = 65536
         return
 
     def _read_output(self, pipe, q):
+        # Reads whatever is available from the pipe, up to chunk_size at a
+        # time, and puts (pipe, chunk) in the queue - with an empty chunk
+        # once we hit the end
         try:
-            for line in iter(lambda: pipe.read(1), b''):
-                q.put(line)
-        except ValueError:
+            for chunk in iter(lambda: os.read(pipe.fileno(), self.chunk_size), b''):
+                q.put((pipe,chunk))
+        except (ValueError, OSError):
             pass
+        q.put((pipe,b''))
         pipe.close()
 
-    def _create_thread(self, output):
-        # Creates a new queue and thread object to watch based on the output pipe sent
-        q = Queue()
+    def _create_thread(self, output, q = None):
+        # Creates a new queue (if needed) and thread object to watch based on
+        # the output pipe sent
+        q = q or Queue()
         t = threading.Thread(target=self._read_output, args=(output, q))
         t.daemon = True
         return (q,t)
 
-    def _stream_output(self, comm, shell = False):
-        output = error = ""
+    def _get_reader(self, stream):
+        # Returns the state used to turn the raw bytes of a pipe into text -
+        # decoded per the locale on python 3, with \r\n and \r translated
+        # to \n the same as universal_newlines would
+        decoder = None
+        if sys.version_info >= (3,0):
+            decoder = codecs.getincrementaldecoder(locale.getpreferredencoding(False))(errors="ignore")
+        return {"stream":stream,"decoder":decoder,"cr":False,"output":[]}
+
+    def _read_chunk(self, reader, data, final = False):
+        if reader["decoder"]:
+            data = reader["decoder"].decode(data,final)
+        if reader["cr"]:
+            # Hang onto a trailing \r until we know if \n follows it
+            data = "\r"+data
+            reader["cr"] = False
+        if not final and data.endswith("\r"):
+            data = data[:-1]
+            reader["cr"] = True
+        data = data.replace("\r\n","\n").replace("\r","\n")
+        if data:
+            reader["stream"].write(data)
+            reader["stream"].flush()
+            reader["output"].append(data)
+
+    def _stream_output(self, comm, shell = False, timeout = None):
+        readers = {}
         p = None
+        timed_out = False
         try:
             if shell and type(comm) is list:
                 comm = " ".join(shlex.quote(x) for x in comm)
             if not shell and type(comm) is str:
                 comm = shlex.split(comm)
-            p = subprocess.Popen(comm, shell=shell, stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0, universal_newlines=True, close_fds=ON_POSIX)
-            # Setup the stdout thread/queue
-            q,t   = self._create_thread(p.stdout)
-            qe,te = self._create_thread(p.stderr)
-            # Start both threads
-            t.start()
-            te.start()
-
-            while True:
-                c = z = ""
-                try: c = q.get_nowait()
-                except Empty: pass
-                else:
-                    sys.stdout.write(c)
-                    output += c
-                    sys.stdout.flush()
-                try: z = qe.get_nowait()
-                except Empty: pass
-                else:
-                    sys.stderr.write(z)
-                    error += z
-                    sys.stderr.flush()
-                if not c==z=="": continue # Keep going until empty
-                # No output - see if still running
-                p.poll()
-                if p.returncode != None:
-                    # Subprocess ended
-                    break
-                # No output, but subprocess still running - stall for 20ms
-                time.sleep(0.02)
-
-            o, e = p.communicate()
-            return (output+o, error+e, p.returncode)
+            p = subprocess.Popen(comm, shell=shell, stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0, close_fds=ON_POSIX)
+            readers[p.stdout] = self._get_reader(sys.stdout)
+            readers[p.stderr] = self._get_reader(sys.stderr)
+            deadline = time.time()+timeout if timeout else None
+            if selectors and ON_POSIX:
+                # Wait on both pipes at once, and read whatever's ready
+                sel = selectors.DefaultSelector()
+                for pipe in readers:
+                    sel.register(pipe, selectors.EVENT_READ)
+                while sel.get_map():
+                    remaining = None if deadline is None else deadline-time.time()
+                    if remaining is not None and remaining <= 0:
+                        timed_out = True
+                        break
+                    for key,_ in sel.select(remaining):
+                        data = os.read(key.fd, self.chunk_size)
+                        if not data:
+                            sel.unregister(key.fileobj)
+                            continue
+                        self._read_chunk(readers[key.fileobj],data)
+                sel.close()
+            else:
+                # No selectors for pipes here - read each on its own thread
+                q = Queue()
+                for pipe in readers:
+                    self._create_thread(pipe,q)[1].start()
+                running = len(readers)
+                while running:
+                    remaining = None if deadline is None else deadline-time.time()
+                    if remaining is not None and remaining <= 0:
+                        timed_out = True
+                        break
+                    try:
+                        # Wake up now and then so a timeout can't be missed
+                        pipe,data = q.get(timeout=min(remaining,1) if remaining is not None else 1)
+                    except Empty:
+                        continue
+                    if not data:
+                        running -= 1
+                        continue
+                    self._read_chunk(readers[pipe],data)
+            if timed_out:
+                p.kill()
+                self._read_chunk(readers[p.stderr],"\nTimed out after {} seconds".format(timeout).encode())
+            p.wait()
         except:
-            if p:
-                try: o, e = p.communicate()
-                except: o = e = ""
-                return (output+o, error+e, p.returncode)
-            return ("", "Command not found!", 1)
+            if not p:
+                return ("", "Command not found!", 1)
+            try: p.kill()
+            except: pass
+            p.wait()
+        for pipe,reader in readers.items():
+            self._read_chunk(reader,b"",final=True)
+            try: pipe.close()
+            except: pass
+        return ("".join(readers[p.stdout]["output"]), "".join(readers[p.stderr]["output"]), p.returncode)
 
     def _decode(self, value, encoding="utf-8", errors="ignore"):
         # Helper method to only decode if bytes type
@@ -80,19 +135,79 @@ class Run:
             return value.decode(encoding,errors)
         return value
 
-    def _run_command(self, comm, shell = False):
+    def _kill(self, p, timed_out):
+        timed_out.set()
+        try: p.kill()
+        except: pass
+
+    def _run_command(self, comm, shell = False, timeout = None):
         c = None
+        timer = None
+        timed_out = threading.Event()
         try:
             if shell and type(comm) is list:
                 comm = " ".join(shlex.quote(x) for x in comm)
             if not shell and type(comm) is str:
                 comm = shlex.split(comm)
             p = subprocess.Popen(comm, shell=shell, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            if timeout:
+                # Kill the process if it's still going once we hit the timeout
+                timer = threading.Timer(timeout, self._kill, (p, timed_out))
+                timer.start()
             c = p.communicate()
         except:
             if c == None:
                 return ("", "Command not found!", 1)
-        return (self._decode(c[0]), self._decode(c[1]), p.returncode)
+        finally:
+            if timer:
+                timer.cancel()
+        out = (self._decode(c[0]), self._decode(c[1]), p.returncode)
+        if timed_out.is_set():
+            out = (out[0], out[1]+"\nTimed out after {} seconds".format(timeout), out[2])
+        return out
+
+    def _run_comm(self, comm):
+        # Runs a single command dict and returns its output - or None if it
+        # has no args to run
+        args   = comm.get("args",   [])
+        shell  = comm.get("shell",  False)
+        stream = comm.get("stream", False)
+        sudo   = comm.get("sudo",   False)
+        stdout = comm.get("stdout", False)
+        stderr = comm.get("stderr", False)
+        mess   = comm.get("message", None)
+        show   = comm.get("show",   False)
+        timeout = comm.get("timeout", None)
+        
+        if not mess == None:
+            print(mess)
+
+        if not len(args):
+            # nothing to process
+            return None
+        if sudo:
+            # Check if we have sudo
+            out = self._run_command(["which", "sudo"])
+            if "sudo" in out[0]:
+                # Can sudo
+                if type(args) is list:
+                    args = [out[0].replace("\n", "")] + args # add to start of list
+                elif type(args) is str:
+                    args = out[0].replace("\n", "") + " " + args # add to start of string
+        
+        if show:
+            print(" ".join(args))
+
+        if stream:
+            # Stream it!
+            return self._stream_output(args, shell, timeout)
+        # Just run and gather output
+        out = self._run_command(args, shell, timeout)
+        if stdout and len(out[0]):
+            print(out[0])
+        if stderr and len(out[1]):
+            print(out[1])
+        return out
 
     def run(self, command_list, leave_on_fail = False):
         # Command list should be an array of dicts
@@ -101,44 +216,9 @@ class Run:
             command_list = [command_list]
         output_list = []
         for comm in command_list:
-            args   = comm.get("args",   [])
-            shell  = comm.get("shell",  False)
-            stream = comm.get("stream", False)
-            sudo   = comm.get("sudo",   False)
-            stdout = comm.get("stdout", False)
-            stderr = comm.get("stderr", False)
-            mess   = comm.get("message", None)
-            show   = comm.get("show",   False)
-            
-            if not mess == None:
-                print(mess)
-
-            if not len(args):
-                # nothing to process
+            out = self._run_comm(comm)
+            if out is None:
                 continue
-            if sudo:
-                # Check if we have sudo
-                out = self._run_command(["which", "sudo"])
-                if "sudo" in out[0]:
-                    # Can sudo
-                    if type(args) is list:
-                        args.insert(0, out[0].replace("\n", "")) # add to start of list
-                    elif type(args) is str:
-                        args = out[0].replace("\n", "") + " " + args # add to start of string
-            
-            if show:
-                print(" ".join(args))
-
-            if stream:
-                # Stream it!
-                out = self._stream_output(args, shell)
-            else:
-                # Just run and gather output
-                out = self._run_command(args, shell)
-                if stdout and len(out[0]):
-                    print(out[0])
-                if stderr and len(out[1]):
-                    print(out[1])
             # Append output
             output_list.append(out)
             # Check for errors
@@ -149,3 +229,42 @@ class Run:
             # We only ran one command - just return that output
             return output_list[0]
         return output_list
+
+    def run_many(self, command_list, jobs = None, leave_on_fail = False):
+        # Runs independent commands at the same time, with up to jobs (or one
+        # per core if None/< 1) going at once.  Returns a list of outputs in
+        # the same order as command_list - commands with no args, or those
+        # that never started because leave_on_fail caught an error first,
+        # get None.  Commands already running when that happens finish.
+        if type(command_list) is dict:
+            command_list = [command_list]
+        try: jobs = int(jobs)
+        except: jobs = 0
+        if jobs < 1:
+            try: jobs = multiprocessing.cpu_count()
+            except NotImplementedError: jobs = 1
+        jobs = min(jobs,len(command_list))
+        if jobs < 2:
+            # Nothing to spread out - keep it simple
+            output_list = [None]*len(command_list)
+            for i,comm in enumerate(command_list):
+                output_list[i] = self._run_comm(comm)
+                if leave_on_fail and output_list[i] and output_list[i][2] != 0:
+                    break
+            return output_list
+        cancelled = threading.Event()
+        def run_comm(comm):
+            if cancelled.is_set():
+                return None
+            out = self._run_comm(comm)
+            if leave_on_fail and out and out[2] != 0:
+                cancelled.set()
+            return out
+        pool = ThreadPool(jobs)
+        try:
+            # chunksize of 1 so each worker only picks up a command once it's
+            # free - letting a failure cancel everything not yet started
+            return pool.map(run_comm,command_list,1)
+        finally:
+            pool.close()
+            pool.join()
@@ -0,0 +1,145 @@
+class Session:
+
+    def __init__(self, d):
+        # Holds facts derived from the tables currently loaded in the passed
+        # DSDT instance - each is gathered the first time it's asked for, and
+        # served from memory after that until the loaded tables change
+        self.d = d
+        self.sort = d.sorted_nicely
+        self.facts = {}
+        self.state = None
+
+    def reset(self):
+        # Drops everything we've gathered so far
+        self.facts = {}
+        self.state = None
+
+    def _get_state(self):
+        # Returns something that changes whenever tables are loaded or
+        # replaced - the dict itself, and each table within it
+        tables = self.d.acpi_tables
+        return (id(tables),tuple(sorted((k,id(v)) for k,v in tables.items())))
+
+    def get(self, key, func, *args):
+        # Returns the fact stored at key - calling func(*args) to gather it
+        # if we don't have it yet
+        state = self._get_state()
+        if state != self.state:
+            # The loaded tables changed under us - start fresh
+            self.facts = {}
+            self.state = state
+        if not key in self.facts:
+            self.facts[key] = func(*args)
+        return self.facts[key]
+
+    def get_table_names(self):
+        # Returns the loaded table names in the order generators walk them
+        return list(self.get("table_names",lambda: self.sort(list(self.d.acpi_tables))))
+
+    def get_address(self, line, split_by="_ADR, ", table=None):
+        if table is None:
+            table = self.d.get_dsdt_or_only()
+        try:
+            return int(table["lines"][line].split(split_by)[1].split(")")[0].replace("Zero","0x0").replace("One","0x1"),16)
+        except:
+            return None
+
+    def _get_adr_paths(self):
+        adr_paths = []
+        for table_name,path in self.d.get_namespace_paths(obj_type="Name",obj="_ADR"):
+            adr_paths.append((table_name,path,self.get_address(path[1],table=self.d.acpi_tables[table_name])))
+        return adr_paths
+
+    def get_adr_paths(self):
+        # Returns a list of (table_name, path, address) tuples for every
+        # Name (_ADR, ...) across all loaded tables
+        return list(self.get("adr_paths",self._get_adr_paths))
+
+    def get_adr_paths_for_table(self, table_name):
+        return [x for x in self.get_adr_paths() if x[0] == table_name]
+
+    def get_device_paths_with_id(self, _id="PNP0A03", id_types=("_HID","_CID"), table=None):
+        if table is None:
+            table = self.d.get_dsdt_or_only()
+        if not table: return []
+        id_types = tuple(id_types) if isinstance(id_types,(list,tuple)) else id_types
+        # Tables stay alive as long as our state matches - so their id is
+        # safe to key on
+        return list(self.get(
+            ("ids",_id.upper(),id_types,id(table)),
+            self.d.get_device_paths_with_id,
+            _id,id_types,table
+        ))
+
+    def get_device_paths_with_hid(self, hid="ACPI000E", table=None):
+        return self.get_device_paths_with_id(_id=hid,id_types=("_HID",),table=table)
+
+    def get_pci_roots(self, table=None):
+        # Returns any PCI root bridges in the passed table
+        roots = []
+        for _id in ("PNP0A08","PNP0A03","ACPI0016"):
+            roots += self.get_device_paths_with_id(_id=_id,table=table)
+        return roots
+
+    def get_all_pci_roots(self):
+        # Returns (table_name, path) tuples for the PCI root bridges across
+        # all loaded tables
+        return list(self.get("pci_roots",self.d.get_namespace_paths_with_id,("PNP0A08","PNP0A03","ACPI0016")))
+
+    def _get_lpc_name(self, skip_ec=False, skip_common_names=False):
+        # Gather each kind of candidate across all tables at once - then walk
+        # only the tables that had any, in order, checking them by priority
+        ecs = {} if skip_ec else dict(self.d.get_namespace_paths_with_id("PNP0C09",("_HID",),by_table=True))
+        names = {}
+        if not skip_common_names:
+            for x in ("LPCB", "LPC0", "LPC", "SBRG", "PX40"):
+                for table_name,path in self.d.get_namespace_paths(obj_type="Device",obj=x):
+                    names.setdefault(table_name,[]).append(path)
+        adrs = {}
+        # Some Intel tables have devices at 0x00140003
+        for table_name,path,adr in self.get_adr_paths():
+            if adr in (0x001F0000, 0x00140003):
+                adrs.setdefault(table_name,[]).append(path)
+        for table_name in self.get_table_names():
+            # The LPCB device will always be the parent of the PNP0C09 device
+            # if found
+            if table_name in ecs:
+                return (".".join(ecs[table_name][0][0].split(".")[:-1]),table_name)
+            # Maybe try common names if we haven't found it yet
+            if table_name in names:
+                return (names[table_name][0][0],table_name)
+            # Finally check by address
+            for path in adrs.get(table_name,[]):
+                # Get the path minus ._ADR
+                lpc_name = path[0][:-5]
+                # Make sure the LPCB device does not have an _HID
+                lpc_hid = lpc_name+"._HID"
+                if any(x[0]==lpc_hid for x in self.d.acpi_tables[table_name].get("paths",[])):
+                    continue
+                return (lpc_name,table_name)
+        return (None,None)
+
+    def get_lpc_name(self, skip_ec=False, skip_common_names=False):
+        # Returns a tuple of the LPC(B) path and the table it was found in -
+        # or (None, None) if it couldn't be located
+        return self.get(("lpc",skip_ec,skip_common_names),self._get_lpc_name,skip_ec,skip_common_names)
+
+    def _get_dev_at_adr(self, target_adr=0x001F0004, exclude_names=("XHC",)):
+        for table_name,path,adr in self.get_adr_paths():
+            if adr != target_adr:
+                continue
+            # Ensure our path minus ._ADR is not top level, that we
+            # didn't match any devices with "XHC" in their name, and
+            # then return the path + parent path + table name
+            path_parts = path[0].split(".")[:-1]
+            if len(path_parts) > 1:
+                # Make sure we account for any excluded names
+                if exclude_names is None or not \
+                any(x.lower() in path_parts[-1].lower() for x in exclude_names):
+                    _path = ".".join(path_parts)
+                    _parent = ".".join(path_parts[:-1])
+                    return (_path,_parent,table_name)
+
+    def get_dev_at_adr(self, target_adr=0x001F0004, exclude_names=("XHC",)):
+        exclude_names = tuple(exclude_names) if exclude_names is not None else None
+        return self.get(("adr",target_adr,exclude_names),self._get_dev_at_adr,target_adr,exclude_names)
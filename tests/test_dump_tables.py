@@ -0,0 +1,64 @@
+import hashlib, json, os, shutil, sys, tempfile, unittest
+
+sys.path.insert(0,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Scripts import dsdt
+
+class NoIaslDSDT(dsdt.DSDT):
+    # Dumping never touches iasl - so don't go looking for it
+    def check_iasl(self, legacy=False, try_downloading=True):
+        return None if legacy else "iasl"
+
+class TestDumpLinuxTables(unittest.TestCase):
+
+    def setUp(self):
+        # Lay out a fake /sys/firmware/acpi/tables
+        self.temp = tempfile.mkdtemp()
+        self.table_dir = os.path.join(self.temp,"tables")
+        self.output = os.path.join(self.temp,"output")
+        os.makedirs(self.output)
+        self.files = {
+            "DSDT":             b"DSDT"+b"\x01"*60,
+            "SSDT1":            b"SSDT"+b"\x02"*40,
+            "dynamic/SSDT1":    b"SSDT"+b"\x03"*40,
+            "data/BERT":        b"\x04"*16
+        }
+        for name,data in self.files.items():
+            path = os.path.join(self.table_dir,*name.split("/"))
+            if not os.path.isdir(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            with open(path,"wb") as f:
+                f.write(data)
+        self.d = NoIaslDSDT(use_cache=False)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp,ignore_errors=True)
+
+    def dumped_names(self, **kwargs):
+        return [n for s,n in self.d.get_linux_tables(self.table_dir,**kwargs)]
+
+    def test_names(self):
+        self.assertEqual(self.dumped_names(),["DSDT.aml","SSDT1.aml"])
+        self.assertEqual(self.dumped_names(include_dynamic=True),["DSDT.aml","SSDT1.aml","DYNAMIC-SSDT1.aml"])
+        self.assertEqual(self.dumped_names(include_data=True),["DSDT.aml","SSDT1.aml","DATA-BERT.bin"])
+
+    def test_manifest(self):
+        manifest = self.d.dump_linux_tables(self.output,table_dir=self.table_dir,include_dynamic=True,include_data=True)
+        sources = {
+            "DSDT.aml":          "DSDT",
+            "SSDT1.aml":         "SSDT1",
+            "DYNAMIC-SSDT1.aml": "dynamic/SSDT1",
+            "DATA-BERT.bin":     "data/BERT"
+        }
+        self.assertEqual(sorted(x["name"] for x in manifest["tables"]),sorted(sources))
+        for entry in manifest["tables"]:
+            data = self.files[sources[entry["name"]]]
+            with open(os.path.join(self.output,entry["name"]),"rb") as f:
+                self.assertEqual(f.read(),data)
+            self.assertEqual(entry["size"],len(data))
+            self.assertEqual(entry["sha256"],hashlib.sha256(data).hexdigest())
+        # The same manifest is saved alongside the tables
+        with open(os.path.join(self.output,"manifest.json")) as f:
+            self.assertEqual(json.load(f),manifest)
+
+if __name__ == "__main__":
+    unittest.main()